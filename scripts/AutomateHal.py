@@ -1,11 +1,88 @@
 from typing import Any
 from pybliometrics.scopus import AuthorRetrieval, AbstractRetrieval, ScopusSearch
-import csv, json, requests, os, re, math, copy, json
+import csv, json, requests, os, re, math, copy, json, time, shelve
 import xml.etree.ElementTree as ET
 import numpy as np
 import pandas as pd
 from unidecode  import unidecode 
 import pycountry as pycountry
+from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import MappingProxyType
+
+
+# Headers for the SWORD upload to HAL.
+# If pdf: Content-Type: application/zip
+HAL_SWORD_URL = 'https://api.archives-ouvertes.fr/sword/hal'
+HAL_SWORD_HEADERS = {
+	'Packaging': 'http://purl.org/net/sword-types/AOfr',
+	'Content-Type': 'text/xml',
+	'X-Allow-Completion': None
+}
+# In debug mode, add X-test header: Only test for correctness without actually uploading.
+HAL_SWORD_HEADERS_TEST = dict(HAL_SWORD_HEADERS, **{'X-test': '1'})
+
+# Attributes of the author elements in the TEI tree, by corresponding-author flag: Built once for all the authors.
+AUTHOR_ROLE_ATTRIB = {False: {'role': 'aut'}, True: {'role': 'crp'}}
+
+# Dictionary mapping Scopus document types to HAL document types.
+# The keys are lower-cased, as Scopus does not always use the same case (e.g., 'Conference paper' and 'Conference Paper').
+DOCTYPE_SCOPUS2HAL = MappingProxyType({
+	'article': 'ART', 'article in press': 'ART', 'review': 'ART', 'business article': 'ART', 'data paper': 'ART',
+	'conference paper': 'COMM', 'conference review': 'COMM',
+	'book': 'OUV', 'book chapter': 'COUV', 'editorial': 'ART', 'short survey': 'ART',
+	'journal': 'ART', 'conference proceeding': 'COMM', 'book series': 'OUV'
+})
+
+# Columns of the csv search results, for each field of the "search_query" mode.
+CSV_FIELDS = {
+	'eid': 'EID', 'doi': 'DOI', 'title': 'Title', 'aggregationType': 'Document Type',
+	'publicationName': 'Source title', 'issueIdentifier': 'Issue', 'volume': 'Volume', 'coverDate': 'Year',
+	'description': 'Abstract', 'fund_acr': 'Funding Details', 'issn': 'ISSN'
+}
+
+# Name space of the TEI trees, used by all the searches in the trees.
+TEI_NS = {'tei': 'http://www.tei-c.org/ns/1.0'}
+# It is the default name space of the exported trees: Register it once, at import.
+ET.register_namespace('', TEI_NS['tei'])
+
+# Sections of the TEI tree edited for each paper: (name, name of the parent section, path from the parent section).
+# The sections without parent are searched from the root. A section must come after its parent.
+TEI_SECTIONS = (
+	('text', None, 'tei:text'),
+	('back', 'text', 'tei:back'),
+	('listOrg', 'back', 'tei:listOrg'),
+	('org', 'listOrg', 'tei:org'),
+	('biblFull', None, 'tei:text/tei:body/tei:listBibl/tei:biblFull'),
+	('titleStmt', 'biblFull', 'tei:titleStmt'),
+	('editionStmt', 'biblFull', 'tei:editionStmt'),
+	('seriesStmt', 'biblFull', 'tei:seriesStmt'),
+	('biblStruct', 'biblFull', 'tei:sourceDesc/tei:biblStruct'),
+	('analytic', 'biblStruct', 'tei:analytic'),
+	('analyticTitle', 'analytic', 'tei:title'),
+	('author', 'analytic', 'tei:author'),
+	('monogr', 'biblStruct', 'tei:monogr'),
+	('imprint', 'monogr', 'tei:imprint'),
+	('profileDesc', 'biblFull', 'tei:profileDesc'),
+	('language', 'profileDesc', 'tei:langUsage/tei:language'),
+	('textClass', 'profileDesc', 'tei:textClass'),
+	('keywords', 'textClass', 'tei:keywords'),
+	('abstract', 'profileDesc', 'tei:abstract')
+)
+
+# Session for the requests to the HAL API, shared by all the objects so that the connections are reused.
+# The failed requests are retried with a backoff, instead of being sent again right away.
+# Only the GET requests are retried: An upload to HAL is never sent twice.
+HAL_TIMEOUT = (3, 15) # Connect and read timeouts, in seconds.
+HAL_SESSION = requests.Session()
+HAL_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32,
+	max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])))
+HAL_SESSION.mount('http://', HAL_SESSION.get_adapter('https://'))
+
+# Characters separating the words of the titles searched in HAL, after normalization.
+TITLE_SEPARATORS = re.compile(r'[^a-z0-9]+')
 
 
 class AutomateHal:
@@ -74,11 +151,25 @@ class AutomateHal:
 
 	'''
 
+	# Results of reqHalRef, shared by all the objects: The same structures are searched for many authors and papers.
+	hal_ref_cache = {}
+	# Results of preprocess_affil_name, by affiliation name: The same HAL labels come back in many searches.
+	preprocessed_affil_cache = {}
+	# HAL domain of the journals, by journalId: Many papers are published in the same journals.
+	journal_domain_cache = {}
+	# Time when the entries of hal_ref_cache and journal_domain_cache were requested from HAL, by key: 
+	# The entries are saved with it, and discarded when they are loaded after hal_cache_expire seconds.
+	hal_ref_cache_times = {}
+	journal_domain_cache_times = {}
+	# Whether the HAL caches saved by the previous runs were loaded (or skipped, if refresh_hal_cache).
+	hal_caches_loaded = False
+
 	def __init__(self, perso_data_path='', author_db_path='', affil_db_path='',
 			  AuthDB='', mode='search_query', stamps=[], 
 			  debug_affiliation_search=False, debug_hal_upload=True, allow_create_new_affiliation=False, 
 			  report_file=[], log_file=[], debug_log_file=[], auths=None, doc_data=None, report_entry=None,
-			  affiliation_db=None):
+			  affiliation_db=None, orcid_cache=None, doi_hit_cache=None, abstract_cache=None, title_hit_cache=None, 
+			  hal_cache_expire=30*24*3600, refresh_hal_cache=False):
 		
 		''' ### Description
 
@@ -101,6 +192,12 @@ class AutomateHal:
 			- 'affil_name', 'status', 'valid_ids', 'affil_names_valid', 'invalid_ids', 'affil_names_invalid'. This DataFrame stores information about affiliations.
 		- `auths` (list): A list of dictionaries to store information about the authors.
 		- `doc_data` (dict): A dictionary to store information about the current document.
+		- `orcid_cache` (dict): ORCIDs of the Scopus authors already looked up in the current run, by Scopus author id.
+		- `doi_hit_cache` (dict): Results of the batch DOI searches in HAL, by lower-cased DOI: The HAL document, or None if not in HAL.
+		- `abstract_cache` (dict): Records from the Abstract Retrieval API prefetched in the current run, by eid.
+		- `title_hit_cache` (dict): Results of the title searches in HAL sent in parallel, by title: The result of reqWithTitle.
+		- `hal_cache_expire` (int): Validity, in seconds, of the HAL references and journal domains saved by the previous runs. Older entries are requested again.
+		- `refresh_hal_cache` (bool): If True, the HAL references and journal domains saved by the previous runs are not loaded.
 
 
 		### Defaults:
@@ -120,11 +217,18 @@ class AutomateHal:
 		- `affiliation_db=pd.DataFrame(columns=['affil_name', 'status', 'valid_ids', 'affil_names_valid', 'invalid_ids', 'affil_names_invalid'])`
 		- `auths=None`
 		- `doc_data=None`
+		- `orcid_cache=None`
+		- `doi_hit_cache=None`
+		- `abstract_cache=None`
+		- `title_hit_cache=None`
+		- `hal_cache_expire=30*24*3600`
+		- `refresh_hal_cache=False`
 		'''
 
 		# Initialize the attributes.
 		self.hal_user_name = '' # HAL username
 		self.hal_pswd = '' # HAL password
+		self.hal_auth = None # Authentication handler for HAL, built once from the credentials.
 		self.AuthDB = AuthDB # A dictionary that stores user-defined data to refine the search results.
 		self.mode = mode # Mode of operation: search_query or csv
 		self.ite = -1 # Index of the current iterature.
@@ -132,6 +236,11 @@ class AutomateHal:
 		self.debug_affiliation_search = debug_affiliation_search # Whether to run in debug mode. If True, not verifying if existed in HAL.
 		self.debug_hal_upload = debug_hal_upload # Whether to upload the documet reference to the HAL repository.
 		self.output_path = './data/outputs/'
+		self.scopus_cache_path = self.output_path + 'scopus_cache' # On-disk cache of the Scopus lookups, kept across runs.
+		self.hal_ref_cache_path = self.output_path + 'hal_ref_cache.json' # Where hal_ref_cache is saved by save_hal_caches.
+		self.journal_domain_cache_path = self.output_path + 'journal_domain_cache.json' # Where journal_domain_cache is saved by save_hal_caches.
+		self.hal_cache_expire = hal_cache_expire # Validity of the entries of the HAL caches saved by the previous runs, in seconds.
+		self.refresh_hal_cache = refresh_hal_cache # Whether to ignore the HAL caches saved by the previous runs.
 		self.report_file = report_file
 		self.log_file = log_file
 		self.debug_log_file = debug_log_file
@@ -139,6 +248,8 @@ class AutomateHal:
 		self.affiliation_db_exist = False
 		self.affil_db_path = affil_db_path
 		self.allow_create_new_affiliation = allow_create_new_affiliation
+		self.upload_executor = None # Thread pool running the uploads to HAL in the background, if any.
+		self.pending_upload = None # Upload of the current paper running in upload_executor, if any.
 
 		# auths: A list of dictionaries to store information about the authors.
 		if not auths==None:
@@ -177,7 +288,8 @@ class AutomateHal:
 				'exit_state': '',
 				'hal_id': '',
 				'hal_url': '',
-				'emails_auths': ''
+				'emails_auths': '',
+				'hal_response': ''
 			}
 		else:
 			self.report_entry = report_entry
@@ -187,6 +299,30 @@ class AutomateHal:
 		else:
 			self.affiliation_db = pd.DataFrame(columns=
 				['affil_name', 'status', 'valid_ids', 'affil_names_valid', 'invalid_ids', 'affil_names_invalid', 'eid', 'author', 'affil_city'])
+
+		# orcid_cache: The ORCIDs already looked up in this run. Shared with the paper handlers, so that each author is looked up once.
+		if isinstance(orcid_cache, dict):
+			self.orcid_cache = orcid_cache
+		else:
+			self.orcid_cache = {}
+
+		# doi_hit_cache: The DOIs already searched in HAL in this run. Shared with the paper handlers, like orcid_cache.
+		if isinstance(doi_hit_cache, dict):
+			self.doi_hit_cache = doi_hit_cache
+		else:
+			self.doi_hit_cache = {}
+
+		# abstract_cache: The Scopus records prefetched in this run, used once by the paper handlers.
+		if isinstance(abstract_cache, dict):
+			self.abstract_cache = abstract_cache
+		else:
+			self.abstract_cache = {}
+
+		# title_hit_cache: The titles already searched in HAL in this run. Shared with the paper handlers, like doi_hit_cache.
+		if isinstance(title_hit_cache, dict):
+			self.title_hit_cache = title_hit_cache
+		else:
+			self.title_hit_cache = {}
 					
 		# Check mode:
 		if mode != 'search_query' and mode != 'csv':
@@ -215,12 +351,25 @@ class AutomateHal:
 			# Get HAL credentials
 			self.hal_user_name = local_data.get("perso_login_hal")
 			self.hal_pswd = local_data.get("perso_mdp_hal")
+		else:
+			# Fall back to the environment, so that the credentials do not need to be stored in a file.
+			self.hal_user_name = os.environ.get('HAL_USER', '')
+			self.hal_pswd = os.environ.get('HAL_PASSWORD', '')
+		self.hal_auth = HTTPBasicAuth(self.hal_user_name, self.hal_pswd)
 
 		# Load valid authors database
+		# The rows are streamed from the file into the dictionary, through a large read buffer.
+		# They are indexed by their normalized key ('surname initial', see normalize_author_name), 
+		# and, if the file has a surname column, by (surname, forename), normalized, to match the authors whose initials differ.
 		if not author_db_path == '':
-			with open(author_db_path, 'r', encoding="utf-8") as auth_fh:
+			with open(author_db_path, 'r', newline='', encoding="utf-8-sig", buffering=1<<20) as auth_fh:
 				reader = csv.DictReader(auth_fh)
-				self.AuthDB = {row['key']: row for row in reader}
+				self.AuthDB = {}
+				for row in reader:
+					key = self.normalize_author_name(row['key'])
+					self.AuthDB[key] = row
+					if row.get('surname'):
+						self.AuthDB.setdefault((self.normalize_author_name(row['surname']), self.normalize_author_name(row['forename'])), row)
 
 		# Load affiliation valid hal ids from past searches.
 		if not affil_db_path == '':
@@ -233,15 +382,74 @@ class AutomateHal:
 				self.affiliation_db = pd.read_csv(affil_db_path)
 				self.affiliation_db_exist = True				
 
+		# Load the HAL references searched in past runs, once: The objects created for each paper share them.
+		if not AutomateHal.hal_caches_loaded:
+			AutomateHal.hal_caches_loaded = True
+			if not self.refresh_hal_cache:
+				self.load_hal_cache(self.hal_ref_cache_path, AutomateHal.hal_ref_cache, AutomateHal.hal_ref_cache_times)
+				self.load_hal_cache(self.journal_domain_cache_path, AutomateHal.journal_domain_cache, AutomateHal.journal_domain_cache_times)
+
 		# Check if the output directory exists
 		if not os.path.exists(self.output_path):
 			# If it doesn't exist, create it
 			os.makedirs(self.output_path)
 
 
+	def load_hal_cache(self, cache_path, cache, cache_times):
+		''' ### Description
+		Load a HAL cache saved by save_hal_caches. The entries older than self.hal_cache_expire seconds, 
+		or saved without their time by the previous versions, are discarded. An unreadable file gives an empty cache.
+
+		### Parameters:
+		- `cache_path` (str): Path to the json file of the cache.
+		- `cache` (dict): The cache to fill.
+		- `cache_times` (dict): The times of the entries of the cache, filled alongside.
+		'''
+
+		saved = self.load_json_cache(cache_path)
+		now = time.time()
+		for key, entry in saved.items():
+			if isinstance(entry, dict) and 'time' in entry and 'value' in entry and now - entry['time'] < self.hal_cache_expire:
+				cache[key] = entry['value']
+				cache_times[key] = entry['time']
+
+
+	def save_hal_caches(self):
+		''' ### Description
+		Save the HAL references and journal domains requested so far, with the time of their request, for the next runs.
+		'''
+
+		now = time.time()
+		# The journals without a domain (9 documents or less in HAL) are not saved: They may have one at the next run.
+		for cache_path, cache, cache_times, keep_none in [
+				(self.hal_ref_cache_path, AutomateHal.hal_ref_cache, AutomateHal.hal_ref_cache_times, True), 
+				(self.journal_domain_cache_path, AutomateHal.journal_domain_cache, AutomateHal.journal_domain_cache_times, False)]:
+			# The entries requested in this run are timed at their first save.
+			saved = {}
+			for key, value in list(cache.items()):
+				if value is None and not keep_none:
+					continue
+				saved[key] = {'value': value, 'time': cache_times.setdefault(key, now)}
+			self.save_json_cache(saved, cache_path)
+
+
+	def normalize_author_name(self, name):
+		"""
+		Normalize a name for the lookups in the author database: Accents removed, lower-cased and stripped.
+
+		Parameters:
+		- name (str): Name to normalize.
+
+		Returns:
+		str: The normalized name.
+		"""
+
+		return unidecode(name).strip().lower()
+
+
 	def hal_upload(self, filepath):
 		"""
-		Uploads TEI XML file to HAL using SWORD protocol.
+		Uploads TEI XML file to HAL using SWORD protocol, and writes the result to self.report_entry.
 
 		Parameters:
 		- filepath (str): Path to the TEI XML file.
@@ -249,50 +457,63 @@ class AutomateHal:
 		Returns: None
 		"""
 
-		url = 'https://api.archives-ouvertes.fr/sword/hal'
+		response = self.post_tei_to_hal(filepath)
+		self.record_hal_upload(response, self.report_entry, self.report_entry['eid'])
 
-		if self.debug_hal_upload:
-			# If debug mode, add X-test header: Only test for correctness without actually uploading.
-			head = {
-				'Packaging': 'http://purl.org/net/sword-types/AOfr',
-				'Content-Type': 'text/xml',
-				'X-Allow-Completion': None,
-				'X-test': '1'
-			}
-		else:
-			# If no debug, upload.
-			head = {
-				'Packaging': 'http://purl.org/net/sword-types/AOfr',
-				'Content-Type': 'text/xml',
-				'X-Allow-Completion': None
-			}
 
-		# If pdf: Content-Type: application/zip
+	def post_tei_to_hal(self, filepath):
+		"""
+		Sends TEI XML file to HAL using SWORD protocol. 
+		It does not modify the object, so that it can run in a worker thread while the next papers are processed.
+
+		Parameters:
+		- filepath (str): Path to the TEI XML file.
+
+		Returns: 
+		requests.Response: The response of HAL.
+
+		Raises:
+		- ValueError: If the TEI file is empty.
+		"""
+
+		# If debug mode, only test for correctness without actually uploading.
+		head = HAL_SWORD_HEADERS_TEST if self.debug_hal_upload else HAL_SWORD_HEADERS
+
+		# The file is already UTF-8 on disk: Stream it as the body of the request, without reading it in memory.
+		with open(filepath, 'rb') as xmlfh:
+			# An empty file is not sent. The error is raised to the caller, which logs it and goes on with the next papers.
+			if os.fstat(xmlfh.fileno()).st_size < 10:
+				raise ValueError('HAL upload: TEI file not loaded: {}'.format(filepath))
 
-		xmlfh = open(filepath, 'r', encoding='utf-8')
-		xmlcontent = xmlfh.read()  # The XML must be read, otherwise import time is very long
-		xmlcontent = xmlcontent.encode('UTF-8')
+			# The upload reuses the connections of the shared session. POST requests are not retried by its adapter.
+			return HAL_SESSION.post(HAL_SWORD_URL, headers=head, data=xmlfh, auth=self.hal_auth)
 
-		# if len(xmlcontent) < 10:
-		# 	self.addRow(doc_id, "HAL upload: Success", '', 'File not loaded', '', '')
-		# 	quit()
 
-		response = requests.post(url, headers=head, data=xmlcontent, auth=(self.hal_user_name, self.hal_pswd))
+	def record_hal_upload(self, response, report_entry, eid):
+		"""
+		Logs the result of an upload to HAL, and writes it to the report entry of the paper.
+		The uploads may finish while other papers are processed: The log entries give the eid of the paper.
+
+		Parameters:
+		- response (requests.Response): The response of HAL to the upload.
+		- report_entry (dict): The report entry of the uploaded paper.
+		- eid (str): Scopus id of the uploaded paper.
+
+		Returns: None
+		"""
+
 		if response.status_code == 202:
 			# Get the hal id and urls of the uploaded file.
 			hal_id, hal_url = self.process_hal_upload_response(response=response)
 			
-			print("Process finished: HAL upload: Success")
-			self.add_an_entry_to_log_file(self.log_file, "Process finished: HAL upload: Success")
-			self.update_dictionary_fields(self.report_entry, fields=['exit_state', 'hal_id', 'hal_url'], values=['Added to HAL', hal_id, hal_url])
+			print("Process finished: HAL upload of {}: Success".format(eid))
+			self.add_an_entry_to_log_file(self.log_file, "Process finished: HAL upload of {}: Success".format(eid))
+			self.update_dictionary_fields(report_entry, fields=['exit_state', 'hal_id', 'hal_url'], values=['Added to HAL', hal_id, hal_url])
 		else:
-			# self.addRow(doc_id, "HAL upload: Error", '', response.text, '', '')
-			print("HAL upload: Error")
+			print("HAL upload of {}: Error".format(eid))
 			print(response.text)
-			self.add_an_entry_to_log_file(self.log_file, "HAL upload fails!")
-			self.add_an_entry_to_log_file(self.log_file, response.text)
-
-		xmlfh.close()
+			self.add_an_entry_to_log_file(self.log_file, "HAL upload of {} fails: {}".format(eid, response.text))
+			self.update_dictionary_fields(report_entry, fields=['exit_state', 'hal_response'], values=['HAL upload: Error', response.text])
 
 
 	def preprocess_affil_name(self, affil_name):
@@ -310,6 +531,11 @@ class AutomateHal:
 		### Returns:
 		- affil_name (str): Preprocessed affiliation name.
 		'''
+		# The result only depends on affil_name: Reuse it if the name was already preprocessed.
+		cached = AutomateHal.preprocessed_affil_cache.get(affil_name)
+		if cached is not None:
+			return cached
+
 		replacements = [
 				('electricite de france', 'edf'),
 				('mines paristech', 'mines paris - psl'),
@@ -339,6 +565,7 @@ class AutomateHal:
 		# Join the words back together with a single space between them
 		output_string = ' '.join(words)
 
+		AutomateHal.preprocessed_affil_cache[affil_name] = output_string
 
 		return output_string
 
@@ -392,16 +619,11 @@ class AutomateHal:
 		else:
 			req = prefix + field + ':' + str(value) + suffix
 
-		found = False
-
-		# Perform the request until a valid JSON response is obtained
-		while not found:
-			req = requests.get(req)
-			try:
-				fromHal = req.json()
-				found = True
-			except:
-				pass
+		# Perform the request: The session retries it if HAL fails or limits the rate.
+		# The raw bytes are parsed directly, which skips the decoding of the response to text.
+		resp = HAL_SESSION.get(req, timeout=HAL_TIMEOUT)
+		resp.raise_for_status()
+		fromHal = json.loads(resp.content)
 
 		num = fromHal['response'].get('numFound')
 		docs = fromHal['response'].get('docs', [])
@@ -433,70 +655,416 @@ class AutomateHal:
 		return reqId
 
 
+	def reqWithIdsBatch(self, dois):
+		"""
+		Searches in HAL for a batch of DOIs with a single request.
+
+		Parameters:
+		- dois (list): List of document DOIs. Empty or non-string values are ignored.
+
+		Returns:
+		dict: The HAL documents found, indexed by their lower-cased DOI.
+			Example: {'10.1000/xyz': {'uri_s': 'uri1', 'docid': 'docid1', 'doiId_s': '10.1000/xyz'}}
+		"""
+
+		dois = [doi for doi in dois if isinstance(doi, str) and doi]
+		if not dois:
+			return {}
+
+		# Perform one HAL request for all the DOIs: doiId_id:("doi_1" OR "doi_2" ...)
+		search_query = 'doiId_id:(' + ' OR '.join('"{}"'.format(doi) for doi in dois) + ')'
+		suffix = '&fl=uri_s,docid,doiId_s&wt=json&rows={}'.format(2*len(dois))
+		_, docs = self.reqHal(search_query=search_query, suffix=suffix)
+
+		found = {}
+		for hal_doc in docs:
+			found.setdefault(str(hal_doc.get('doiId_s', '')).lower(), hal_doc)
+
+		return found
+
+
+	def bulk_probe_hal(self, dois, titles=None, batch_size=50, max_workers=8):
+		"""
+		Search in HAL a list of DOIs, with batch_size DOIs per request, and save the results in self.doi_hit_cache.
+		The DOIs not in HAL are saved with None, so that they are not requested again. The DOIs whose batch request fails 
+		are not saved: They are searched again when the paper is processed.
+
+		If titles are given, the papers not found by DOI are then searched by title, with max_workers requests in parallel, 
+		and the results are saved in self.title_hit_cache. The titles whose request fails are not saved: They are searched again 
+		when the paper is processed.
+
+		Parameters:
+		- dois (list): List of document DOIs. Empty or non-string values are ignored.
+		- titles (list): List of document titles, in the same order as dois (default: None, no title search).
+		- batch_size (int): Number of DOIs per HAL request (default: 50).
+		- max_workers (int): Maximal number of HAL requests in flight (default: 8).
+
+		Returns:
+		dict: self.doi_hit_cache.
+		"""
+
+		def probe_batch(batch):
+			# Return the documents found, or None if the request fails.
+			try:
+				return self.reqWithIdsBatch(batch)
+			except Exception:
+				return None
+
+		new_dois = list({doi.lower() for doi in dois if isinstance(doi, str) and doi and doi.lower() not in self.doi_hit_cache})
+		batches = [new_dois[k:k+batch_size] for k in range(0, len(new_dois), batch_size)]
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			for batch, found in zip(batches, executor.map(probe_batch, batches)):
+				if found is None:
+					continue
+				for doi in batch:
+					self.doi_hit_cache[doi] = found.get(doi)
+
+			if titles is not None:
+				# Search by title the papers whose DOI is missing or not in HAL.
+				new_titles = list({title for doi, title in zip(dois, titles) 
+					if isinstance(title, str) and title and title not in self.title_hit_cache 
+					and not (isinstance(doi, str) and self.doi_hit_cache.get(doi.lower()))})
+				searches = [executor.submit(self.reqWithTitle, title) for title in new_titles]
+				for title, search in zip(new_titles, searches):
+					try:
+						self.title_hit_cache[title] = search.result()
+					except Exception:
+						pass
+
+		return self.doi_hit_cache
+
+
+	def load_json_cache(self, cache_path):
+		"""
+		Load a cache saved by save_json_cache. A missing or unreadable file (e.g. left half-written by an older version) 
+		gives an empty cache.
+
+		Parameters:
+		- cache_path (str): Path to the json file of the cache.
+
+		Returns:
+		dict: The cache, or {} if it cannot be loaded.
+		"""
+
+		try:
+			with open(cache_path, 'r', encoding='utf-8') as fh:
+				cache = json.load(fh)
+		except (OSError, json.JSONDecodeError):
+			return {}
+		return cache if isinstance(cache, dict) else {}
+
+
+	def save_json_cache(self, cache, cache_path):
+		"""
+		Save a cache to a json file. It is written to a temporary file first, which then replaces the previous file: 
+		An interrupted save leaves the previous file intact.
+
+		Parameters:
+		- cache (dict): The cache to save.
+		- cache_path (str): Path to the json file of the cache.
+		"""
+
+		tmp_path = cache_path + '.tmp'
+		with open(tmp_path, 'w', encoding='utf-8', buffering=1<<20) as fh:
+			json.dump(cache, fh)
+		os.replace(tmp_path, cache_path)
+
+
+	def verify_papers_in_hal(self, dois, titles, max_workers=16, batch_size=50, cache_path='', cache_expire=30*24*3600, refresh_cache=False, progress=None):
+		"""
+		Verify for a list of papers if they are already in HAL. The papers are first searched by DOI, 
+		with batch_size DOIs per request, and then by title for those not found by DOI.
+		If the request of a batch of DOIs fails, the DOIs of this batch are requested one by one.
+		The requests are I/O bound, so at most max_workers of them are sent in parallel.
+
+		If cache_path is given, the papers found in HAL are saved in this json file, and those found in a previous run 
+		(less than cache_expire seconds ago) are not requested again. The papers not in HAL are not cached: 
+		They are checked again at each run, as they may have been uploaded since.
+
+		Parameters:
+		- dois (list): List of document DOIs.
+		- titles (list): List of document titles, in the same order as dois.
+		- max_workers (int): Maximal number of HAL requests in flight (default: 16).
+		- batch_size (int): Number of DOIs per HAL request (default: 50).
+		- cache_path (str): Path to the json file caching the results. If '', no cache is used (default: '').
+		- cache_expire (int): Validity of a cached result, in seconds (default: 30 days).
+		- refresh_cache (bool): If True, the cached results are discarded (default: False).
+		- progress (callable): If given, called with the number of papers whose check is finished, as the checks finish 
+		  (e.g. the update method of a tqdm bar) (default: None).
+
+		Returns:
+		list: For each paper, True if it is already in HAL, False if not, or the error raised while checking it.
+		"""
+
+		def check_batch(batch):
+			# Return the documents found, or None if the request fails: The DOIs of the batch are then requested one by one.
+			try:
+				return self.reqWithIdsBatch(batch)
+			except Exception:
+				return None
+
+		def check_paper(doi, title, found_by_doi):
+			# Return True/False, or the error raised by the requests.
+			# found_by_doi is None if the request of the batch of the doi failed.
+			try:
+				if found_by_doi is None and self.reqWithIds(doi)[0] > 0:
+					return True
+				if not title:
+					return False
+				return self.reqWithTitle(title)[0] > 0
+			except Exception as error:
+				return error
+
+		def has_doi(doi):
+			return isinstance(doi, str) and doi != ''
+
+		def cache_key(doi, title):
+			# Papers are identified by their doi, or by their title if there is no doi.
+			if has_doi(doi):
+				return 'doi:' + doi.lower()
+			return 'title:' + str(title).lower().strip()
+
+		def report_progress(n):
+			if progress is not None and n > 0:
+				progress(n)
+
+		# Load the results from the previous runs. Only the papers found in HAL are kept.
+		cache = {}
+		if cache_path and not refresh_cache:
+			cache = self.load_json_cache(cache_path)
+		now = time.time()
+		cache = {key: entry for key, entry in cache.items() if isinstance(entry, dict) and entry.get('in_hal') is True and now - entry.get('time', 0) < cache_expire}
+
+		keys = [cache_key(doi, title) for doi, title in zip(dois, titles)]
+		in_hal = [True if keys[k] in cache else None for k in range(len(dois))]
+		to_check = [k for k in range(len(dois)) if in_hal[k] is None]
+		report_progress(len(dois) - len(to_check))
+
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			# First check by doi. Only the papers with a doi are put in the batches.
+			dois_to_check = list({dois[k].lower() for k in to_check if has_doi(dois[k])})
+			batches = [dois_to_check[k:k+batch_size] for k in range(0, len(dois_to_check), batch_size)]
+			found_by_doi = {}
+			for batch, found in zip(batches, executor.map(check_batch, batches)):
+				for doi in batch:
+					found_by_doi[doi] = None if found is None else doi in found
+
+			# Then, check the papers not found by doi: By doi alone if their batch failed, and by title.
+			checks = {}
+			for k in to_check:
+				doi = dois[k].lower() if has_doi(dois[k]) else None
+				found = found_by_doi[doi] if doi is not None else False
+				if found:
+					in_hal[k] = True
+				else:
+					checks[executor.submit(check_paper, doi, titles[k], found)] = k
+			report_progress(len(to_check) - len(checks))
+			for check in as_completed(checks):
+				in_hal[checks[check]] = check.result()
+				report_progress(1)
+
+		# Save the papers found in HAL for the next runs. Errors and papers not in HAL are not cached.
+		if cache_path:
+			for k in to_check:
+				if in_hal[k] is True:
+					cache[keys[k]] = {'in_hal': True, 'time': now}
+			self.save_json_cache(cache, cache_path)
+
+		return in_hal
+
+
+	def normalize_title(self, title):
+		"""
+		Normalize a title for the searches in HAL: Accents and special characters removed, lower-cased, 
+		and the words separated by single spaces.
+
+		Parameters:
+		- title (str): Title to normalize.
+
+		Returns:
+		str: The normalized title.
+		"""
+
+		return TITLE_SEPARATORS.sub(' ', unidecode(title.replace('&amp;', ' ')).lower()).strip()
+
+
 	def reqWithTitle(self, title):
 		"""
 		Searches in HAL to check if a record with the same title exists.
+		HAL returns the documents with the words of the title: Only those whose normalized title is the same are kept.
 
 		Parameters:
-		- titles (list): List of titles to search for.
+		- title (str): Title to search for.
 
 		Returns:
-		list: List containing the number of items found and a list of HAL URIs.
-			Example: [2, ['uri1', 'uri2']]
+		list: List containing the number of items found and a list of HAL documents.
+			Example: [2, [{'uri_s': 'uri1', 'docid': 'docid1', 'title_s': ['Title 1']}, ...]]
 		"""
 
-		title = re.sub(r'&amp;', ' ', title)
-		title = re.sub(r'[^a-zA-Z0-9 ]', '', title)		
+		title = self.normalize_title(title)
+		if not title:
+			return [0, []]
 
 		# Perform a HAL request to find documents by title
 		search_query = 'title_t:('+ title + ')'
-		suffix='&fl=uri_s,docid&wt=json'
-		reqTitle = self.reqHal(search_query=search_query, suffix=suffix)
+		suffix='&fl=uri_s,docid,title_s&wt=json'
+		num, docs = self.reqHal(search_query=search_query, suffix=suffix)
 
+		# title_s is a list in HAL, with a title per language.
+		docs = [doc for doc in docs if any(self.normalize_title(hal_title) == title 
+			for hal_title in ([doc['title_s']] if isinstance(doc.get('title_s'), str) else doc.get('title_s', [])))]
 		
-		return reqTitle
+		return [len(docs), docs]
 	
 
-	def reqHalStamp(self, stamp, start_year, end_year=2099):
+	def reqHalStamp(self, stamp, start_year, end_year=2099, rows=1000, max_workers=8):
 		"""
 		Performs a request to the HAL API to get the results from a group by its stamp.
+		The results are fetched by pages of rows documents: The first page gives the number of documents, 
+		then the other pages are fetched in parallel, with at most max_workers requests in flight.
 
 		Parameters:
 		- stamp (str): The stamp of a group.
+		- start_year (int): First year of production.
+		- end_year (int): Last year of production (default: 2099).
+		- rows (int): Number of documents per page (default: 1000).
+		- max_workers (int): Maximal number of pages requested in parallel (default: 8).
 
 		Returns:
 		list: List containing the number of items found and a list of HAL documents.
 		"""
 
-		req = 'https://api.archives-ouvertes.fr/search/index/?q=collCode_s:{}'.format(stamp) + \
-			'+producedDateY_i:[2018+TO+2025]&sort=producedDateY_i%20desc&submit=&docType_s=ART+OR+COMM+OR+POSTER+OR+OUV+OR+COUV+OR+PROCEEDINGS+OR+BLOG+OR+ISSUE+OR+NOTICE+OR+TRAD+OR+PATENT+OR+OTHER+OR+UNDEFINED+OR+REPORT+OR+THESE+OR+HDR+OR+LECTURE+OR+VIDEO+OR+SON+OR+IMG+OR+MAP+OR+SOFTWARE&submitType_s=notice+OR+file+OR+annex&rows=3000'
+		search_query = 'collCode_s:' + str(stamp) + '+producedDateY_i:[{}+TO+{}]'.format(start_year, end_year)
+		prefix_sort = '&sort=producedDateY_i%20desc,docid%20asc'
+		prefix_type = '&docType_s=ART+OR+COMM+OR+POSTER+OR+OUV+OR+COUV+OR+PROCEEDINGS+OR+BLOG+OR+ISSUE+OR+NOTICE+OR+TRAD+OR+PATENT+OR+OTHER+OR+UNDEFINED+OR+REPORT+OR+THESE+OR+HDR+OR+LECTURE+OR+VIDEO+OR+SON+OR+IMG+OR+MAP+OR+SOFTWARE&submitType_s=notice+OR+file+OR+annex'
+		suffix = prefix_sort + prefix_type + '&fl=docid,uri_s,title_s&wt=json&rows={}&start={}'
+
+		# Get the first page, and the total number of documents.
+		num, docs = self.reqHal(search_query=search_query, suffix=suffix.format(rows, 0))
+
+		# Get the other pages in parallel.
+		if num > rows:
+			with ThreadPoolExecutor(max_workers=max_workers) as executor:
+				pages = executor.map(lambda start: self.reqHal(search_query=search_query, suffix=suffix.format(rows, start))[1], 
+						 range(rows, num, rows))
+				for page in pages:
+					docs.extend(page)
+
+		return [num, docs]
+
+
+	def reqHalDois(self, affils, start_year, end_year=2099, rows=1000):
+		"""
+		Performs paged requests to the HAL API to get the DOIs of all the documents of some affiliations in a range of years.
+		The cost grows with the number of documents matched: One request per rows documents. Prefer the names of 
+		the structure itself to broad names (e.g. of a university), which match far more documents.
+
+		Parameters:
+		- affils (list): Different ways of spelling the affiliations.
+		- start_year (int): First year of publication.
+		- end_year (int): Last year of publication (default: 2099).
+		- rows (int): Number of documents per page (default: 1000).
+
+		Returns:
+		set: The lower-cased DOIs of the documents found in HAL.
+		"""
+
+		search_query = 'structure_t:(' + ' OR '.join('"{}"'.format(affil) for affil in affils) + ')' + \
+			'&fq=producedDateY_i:[{} TO {}]'.format(start_year, end_year)
+
+		hal_dois = set()
+		start = 0
+		while True:
+			suffix = '&fl=doiId_s&wt=json&sort=docid asc&rows={}&start={}'.format(rows, start)
+			num, docs = self.reqHal(search_query=search_query, suffix=suffix)
+			hal_dois.update(str(hal_doc['doiId_s']).lower() for hal_doc in docs if 'doiId_s' in hal_doc)
+			start += rows
+			if not docs or start >= num:
+				break
+
+		return hal_dois
+
+
+	def reqHalJournalDomain(self, journal_id):
+		"""
+		Performs a request to the HAL API to get the main domain of the documents of a journal.
+		The results are memoized in AutomateHal.journal_domain_cache, so that each journal is requested only once in a run.
+		The journals without a domain are not saved for the next runs (see save_hal_caches).
+
+		Parameters:
+		- journal_id (str): HAL id of the journal.
+
+		Returns:
+		str or None: The main domain of the journal, or None if the journal has 9 documents or less in HAL.
+		"""
+
+		if journal_id not in AutomateHal.journal_domain_cache:
+			prefix = 'https://api.archives-ouvertes.fr/search/?rows=0'
+			suffix = '&facet=true&facet.field=domainAllCode_s&facet.sort=count&facet.limit=2'
+			req = HAL_SESSION.get(prefix + '&q=journalId_i:' + journal_id + suffix, timeout=HAL_TIMEOUT)
+			req.raise_for_status()
+			req = json.loads(req.content)
+			domain = None
+			if req["response"]["numFound"] > 9:  # Retrieve domain from journal if there are more than 9 occurrences
+				domain = req['facet_counts']['facet_fields']['domainAllCode_s'][0]
+			AutomateHal.journal_domain_cache[journal_id] = domain
+
+		return AutomateHal.journal_domain_cache[journal_id]
+
+
+	def format_issn(self, issn):
+		"""
+		Format an ISSN from Scopus (e.g., '12345678') as in HAL (e.g., '1234-5678').
+
+		Parameters:
+		- issn (str): ISSN from Scopus.
+
+		Returns:
+		str: The formatted ISSN.
+		"""
+
+		issn = issn.zfill(8)
+		return f'{issn[:4]}-{issn[4:]}'
 
-		prefix = 'https://api.archives-ouvertes.fr/search/?'
-		prefix_produceDate = '+producedDateY_i:[{}+TO+{}]'.format(start_year, end_year)
-		prefix_sort = '&sort=producedDateY_i%20desc'
-		prefix_type = '&docType_s=ART+OR+COMM+OR+POSTER+OR+OUV+OR+COUV+OR+PROCEEDINGS+OR+BLOG+OR+ISSUE+OR+NOTICE+OR+TRAD+OR+PATENT+OR+OTHER+OR+UNDEFINED+OR+REPORT+OR+THESE+OR+HDR+OR+LECTURE+OR+VIDEO+OR+SON+OR+IMG+OR+MAP+OR+SOFTWARE&submitType_s=notice+OR+file+OR+annex&rows=3000'
-		suffix = "&fl=docid, uri_s,title_s&wt=json"
-		req = prefix + 'q=collCode_s:' + str(stamp) + prefix_produceDate + prefix_produceDate + prefix_sort + prefix_type + suffix
-		found = False
 
-		# Perform the request until a valid JSON response is obtained
-		while not found:
-			req = requests.get(req)
+	def prefetch_journals(self, issns, max_workers=8):
+		''' ### Description
+		Search in parallel the journals of the papers in HAL, by ISSN, and then their domains, before the papers are processed one by one.
+		The results are kept in AutomateHal.hal_ref_cache and AutomateHal.journal_domain_cache, where the generation of the 
+		TEI trees finds them.
+
+		### Parameters: 
+		- `issns` (list): ISSNs of the papers, from Scopus. Empty or non-string values are ignored.
+		- `max_workers` (int): Maximal number of HAL requests in flight. Default: 8.
+		'''
+
+		def fetch_journal(issn):
+			# Errors are ignored here: The journal is requested again when the paper is processed, which reports them.
 			try:
-				fromHal = req.json()
-				found = True
-			except:
+				reqIssn = self.reqHalRef(ref_name='journal', 
+						search_query='(text:({}) valid_s:"VALID")'.format(self.format_issn(issn)))
+				if reqIssn[0] > 0:
+					self.reqHalJournalDomain(str(reqIssn[1][0]['docid']))
+			except Exception:
 				pass
 
-		num = fromHal['response'].get('numFound')
-		docs = fromHal['response'].get('docs', [])
+		issns = {issn for issn in issns if issn and isinstance(issn, str)}
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			list(executor.map(fetch_journal, issns))
 
-		return [num, docs]
+
+	@staticmethod
+	def hal_ref_key(ref_name, search_query, return_field):
+		''' Key of a reference request in AutomateHal.hal_ref_cache.
+		Minor variants of whitespace, case and trailing ';' share the same cache entry.
+		'''
+		return '{}|{}|{}'.format(ref_name, search_query.strip().rstrip(';').lower(), return_field)
 
 
 	def reqHalRef(self, ref_name, search_query="", return_field="&fl=docid,label_s&wt=json"):
 		"""
 		Performs a request to the HAL API to get references to some fields.
+		The results are memoized in AutomateHal.hal_ref_cache, so that each reference is requested only once.
 
 		Parameters:
 		- ref_name (str): Reference field that you want information (e.g., 'structure', 'author').
@@ -509,12 +1077,16 @@ class AutomateHal:
 		"""
 
 		# Encode the value to deal with special symbols like &
-		search_query = re.sub(r'&amp;', '& ', search_query)
-		search_query = re.sub(r'&', ' ', search_query)
+		search_query = search_query.replace('&amp;', '& ').replace('&', ' ')
 
-		[num, docs] = self.reqHal(search_category='ref/{}'.format(ref_name), 
+		key = self.hal_ref_key(ref_name, search_query, return_field)
+		if key not in AutomateHal.hal_ref_cache:
+			AutomateHal.hal_ref_cache[key] = self.reqHal(search_category='ref/{}'.format(ref_name), 
 							search_query=search_query, suffix=return_field)
 
+		# Return a copy: The callers may modify the documents.
+		[num, docs] = copy.deepcopy(AutomateHal.hal_ref_cache[key])
+
 		return [num, docs]	
 
 
@@ -595,11 +1167,9 @@ class AutomateHal:
 				# Save to csv.
 				data.to_csv(json_file_path, index=False)
 			else:
-				json_output = json.dumps(data, indent=4)
-
-				# Write the JSON string to the file
-				with open(json_file_path, 'w') as json_file:
-					json_file.write(json_output)
+				# Write the JSON to the file through a large buffer.
+				with open(json_file_path, 'w', buffering=1<<20) as json_file:
+					json.dump(data, json_file, indent=4)
 
 
 		# Define log files to be saved.
@@ -622,42 +1192,150 @@ class AutomateHal:
 		def transform_page_range(df_result):
 			''' ### Description
 			For the csv search result, this function will transform the page range into a string.
+			The whole columns are transformed at once, instead of one row at a time.
 			'''
 			df_result['pageRange'] = ''
-			for i, row in df_result.iterrows():
-				if pd.notna(row['Page start']) and pd.notna(row['Page end']):
-					df_result.loc[i, 'pageRange'] = str(int(row['Page start'])) + "-" + str(int(row['Page end']))
+			has_pages = df_result['Page start'].notna() & df_result['Page end'].notna()
+			if has_pages.any():
+				df_result.loc[has_pages, 'pageRange'] = df_result.loc[has_pages, 'Page start'].astype(int).astype(str) + \
+					'-' + df_result.loc[has_pages, 'Page end'].astype(int).astype(str)
 
 
 		def transform_authkeywords(df_result):
 			''' ### Description
 			For the csv search result, this function will transform the authkeywords into a string.
 			'''
-			df_result['authkeywords'] = ''
-			for i, row in df_result.iterrows():
-				if isinstance(row['Author Keywords'], str):
-					df_result.loc[i, 'authkeywords'] = row['Author Keywords'].replace(';', ' |')
+			df_result['authkeywords'] = df_result['Author Keywords'].map(lambda x: x.replace(';', ' |') if isinstance(x, str) else '')
 
 		if self.mode == 'csv':
-			df_result['eid'] = df_result['EID']
-			df_result['doi'] = df_result['DOI']
-			df_result['title'] = df_result['Title']
-			df_result['aggregationType'] = df_result['Document Type']
-			df_result["publicationName"] = df_result["Source title"]
-			df_result['issueIdentifier'] = df_result['Issue']
-			df_result['volume'] = df_result['Volume']
-			df_result['coverDate'] = df_result['Year']
-			df_result['description'] = df_result['Abstract']
+			for field, csv_column in CSV_FIELDS.items():
+				df_result[field] = df_result[csv_column]
 			df_result['fund_no'] = ''
-			df_result['fund_acr'] = df_result['Funding Details']
-			df_result['issn'] = df_result['ISSN']
-			df_result['author_names'] = df_result['Author full names'].apply(lambda x: re.sub(r'\s*\(\d+\)', '', x))
-			df_result['author_names'] = df_result['author_names'].apply(lambda x: x.replace('; ', ';'))
+			df_result['author_names'] = df_result['Author full names'].str.replace(r'\s*\(\d+\)', '', regex=True).str.replace('; ', ';', regex=False)
 			transform_page_range(df_result)
 			transform_authkeywords(df_result)
 
 	
-	def process_papers(self, df_result, row_range=[0, 200]):
+	def get_orcids_from_abstract(self, ab):
+		"""
+		Get the ORCIDs of the authors which are given in the record from the Abstract Retrieval API, 
+		so that they do not need to be requested from the Author Retrieval API.
+
+		Parameters:
+		- ab (structure): the results from abstract retrival api.
+
+		Returns:
+		dict: The ORCIDs given in the record, by Scopus id of the author.
+		"""
+		orcids = {}
+		for authors in (ab.authorgroup, ab.authors):
+			for auth in authors or []:
+				orcid = getattr(auth, 'orcid', None)
+				if orcid and auth.auid:
+					orcids.setdefault(auth.auid, orcid)
+		return orcids
+
+
+	def read_cached_orcid(self, cache, key):
+		""" 
+		Read an ORCID saved on disk with the time of its request. The entries older than self.hal_cache_expire seconds, 
+		or saved without their time by the previous versions, are ignored, so that the authors are requested again.
+
+		Parameters:
+		- cache (shelve.Shelf): The disk cache of the ORCIDs.
+		- key (str): Key of the author in the cache.
+
+		Returns: The ORCID, False if the author has no ORCID, or None if the entry is missing or expired.
+		"""
+
+		entry = cache.get(key)
+		if isinstance(entry, tuple) and len(entry) == 2 and time.time() - entry[1] < self.hal_cache_expire:
+			return entry[0]
+		return None
+
+
+	def found_in_hal_prefetch(self, doi, title):
+		""" 
+		Tells if a paper was found in HAL by bulk_probe_hal, by its DOI or its title.
+
+		Parameters:
+		- doi (str): DOI of the paper.
+		- title (str): Title of the paper.
+
+		Returns: True if the paper was found in HAL; False if it was not found or not searched.
+		"""
+
+		if isinstance(doi, str) and self.doi_hit_cache.get(doi.lower()):
+			return True
+		return title in self.title_hit_cache and self.title_hit_cache[title][0] > 0
+
+
+	def prefetch_scopus_records(self, eids, max_workers=8):
+		''' ### Description
+		Retrieve in parallel the Scopus records of the papers and the ORCIDs of their authors, before the papers are processed one by one.
+		The records are kept in self.abstract_cache and the ORCIDs in self.orcid_cache, so that the processing of each paper 
+		does not wait for the Scopus API, nor reads the records again from the pybliometrics cache.
+
+		### Parameters: 
+		- `eids` (list): Scopus ids of the papers.
+		- `max_workers` (int): Maximal number of Scopus requests in flight. Default: 8.
+		'''
+
+		def fetch_abstract(eid):
+			# Errors are ignored here: They are reported when the paper is processed.
+			try:
+				return AbstractRetrieval(eid, view='FULL')
+			except Exception:
+				return None
+
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			authorgroups = []
+			for eid, ab in zip(eids, executor.map(fetch_abstract, eids)):
+				if ab is not None:
+					self.abstract_cache[eid] = ab
+					authorgroups.append(ab.authorgroup or [])
+					# The ORCIDs given in the record do not need to be requested.
+					self.orcid_cache.update(self.get_orcids_from_abstract(ab))
+		auids = {auth.auid for authors in authorgroups for auth in authors if auth.auid}
+		self.prefetch_orcids(auids, max_workers=max_workers)
+
+
+	def prefetch_orcids(self, auids, max_workers=8):
+		''' ### Description
+		Retrieve in parallel the ORCIDs of the authors which are not in self.orcid_cache yet. 
+		The ORCIDs are first read from the disk cache in self.scopus_cache_path: Only the missing or expired ones are requested 
+		from the Author Retrieval API, and then saved in both caches.
+
+		### Parameters: 
+		- `auids` (iterable): Scopus ids of the authors.
+		- `max_workers` (int): Maximal number of Scopus requests in flight. Default: 8.
+		'''
+
+		def fetch_orcid(auid):
+			# Errors are ignored here: The ORCID is requested again by get_orcid, which reports them.
+			try:
+				return AuthorRetrieval(auid).orcid or False
+			except Exception:
+				return None
+
+		auids = {auid for auid in auids if auid and auid not in self.orcid_cache}
+		if not auids:
+			return
+		with shelve.open(self.scopus_cache_path) as cache:
+			for auid in auids:
+				orcid = self.read_cached_orcid(cache, 'orcid:{}'.format(auid))
+				if orcid is not None:
+					self.orcid_cache[auid] = orcid
+			auids = [auid for auid in auids if auid not in self.orcid_cache]
+			if auids:
+				with ThreadPoolExecutor(max_workers=max_workers) as executor:
+					for auid, orcid in zip(auids, executor.map(fetch_orcid, auids)):
+						if orcid is not None:
+							self.orcid_cache[auid] = orcid
+							cache['orcid:{}'.format(auid)] = (orcid, time.time())
+
+
+	def process_papers(self, df_result, row_range=[0, 200], max_workers=8, dump_every=50, upload_workers=4):
 		''' ### Description
 		This is the entry point of the main function. It iterates over all the papers in the scopus search results, 
 		extract information, and upload it to HAL.
@@ -665,49 +1343,130 @@ class AutomateHal:
 		### Parameters: 
 		- `df_result` (DataFrame): DataFrame containing the search results from Scopus.		
 		- `row_range` (list): List of the range of rows to be processed. Default: [0, 200].
+		- `max_workers` (int): Maximal number of Scopus requests in flight when prefetching the records. If 1, no prefetching. Default: 8.
+		- `dump_every` (int): When a paper fails, the log files are saved if they were not saved in the last dump_every papers. Default: 50.
+		- `upload_workers` (int): Number of uploads to HAL running in the background while the next papers are processed. If 0, each paper is uploaded before processing the next one. Default: 4.
 		'''
 
 		if self.mode == 'csv':
 			self.treat_csv_search_result(df_result)
 
+		# The Scopus and HAL requests are I/O bound: Prefetch them in parallel for the papers to be processed.
+		# The HAL journals do not depend on the papers: They are prefetched while the papers are searched in HAL. 
+		# The Scopus records are only needed for the papers which are not in HAL yet: They are prefetched after the HAL search.
+		if max_workers > 1:
+			in_range = (df_result.index >= min(row_range)) & (df_result.index <= max(row_range))
+			eids = df_result.loc[in_range, 'eid'].tolist()
+
+			def log_prefetch_error(error):
+				# The prefetches are only an optimization: If one fails, the papers request their data when they are processed.
+				print('Error prefetching the papers: {}'.format(error))
+				self.add_an_entry_to_log_file(self.log_file, 
+				'Error prefetching the papers: {}'.format(error))
+
+			with ThreadPoolExecutor(max_workers=1) as stages:
+				journals = stages.submit(self.prefetch_journals, df_result.loc[in_range, 'issn'].tolist(), max_workers=max_workers)
+				# Search the DOIs in HAL by batches, if the papers are to be checked in HAL, 
+				# and keep the papers which are not found.
+				if not self.debug_affiliation_search and not self.debug_hal_upload:
+					dois, titles = df_result.loc[in_range, 'doi'].tolist(), df_result.loc[in_range, 'title'].tolist()
+					try:
+						self.bulk_probe_hal(dois, titles, max_workers=max_workers)
+						eids = [eid for eid, doi, title in zip(eids, dois, titles) if not self.found_in_hal_prefetch(doi, title)]
+					except Exception as error:
+						log_prefetch_error(error)
+				try:
+					self.prefetch_scopus_records(eids, max_workers=max_workers)
+				except Exception as error:
+					log_prefetch_error(error)
+				try:
+					journals.result()
+				except Exception as error:
+					log_prefetch_error(error)
+
+		# The uploads to HAL run in the background: The result of each one is written to the report entry of its paper 
+		# as soon as it is finished.
+		self.upload_executor = ThreadPoolExecutor(max_workers=upload_workers) if upload_workers > 0 else None
+		pending_uploads = []
+
+		def record_uploads(wait=False):
+			# Write the results of the finished uploads, or of all of them if wait. The others stay pending.
+			still_pending = []
+			for eid, upload, report_entry in pending_uploads:
+				if not wait and not upload.done():
+					still_pending.append((eid, upload, report_entry))
+					continue
+				try:
+					self.record_hal_upload(upload.result(), report_entry, eid)
+				except Exception as error:
+					print('Error uploading paper: {}. Log saved.'.format(eid))
+					self.add_an_entry_to_log_file(self.log_file, 
+					'Error uploading paper {}: {}'.format(eid, error))
+					self.update_dictionary_fields(report_entry, fields=['exit_state', 'hal_response'], values=['HAL upload: Error', str(error)])
+			pending_uploads[:] = still_pending
+
 		# Address the record in the scopus dataset one by one.
+		# If the loop is interrupted, the uploads already started are still waited for and written to the report, 
+		# and the log files are saved.
 		n = len(df_result)
-		for i, doc in df_result.iterrows():
-			if 'row_range' in locals():
-				# For debugging: Limit to first rowRange records.
-				if i < min(row_range) : continue
-				elif i > max(row_range) : break
-			
-			# Update the iteration index.
-			self.ite = i
-			print('{}/{} iterations: {}'.format(i+1, n, doc['eid']))
-			self.add_an_entry_to_log_file(self.log_file, 
-				'{}/{} iterations: {}'.format(i+1, n, doc['eid']))
-			# Process the corresponding paper.
-			try:
-				self.process_one_paper(doc)
-			except Exception as error:
-				print('Error processing paper: {}. Log saved.'.format(doc['eid']))
+		last_dump = -dump_every
+		try:
+			for i, doc in df_result.iterrows():
+				if 'row_range' in locals():
+					# For debugging: Limit to first rowRange records.
+					if i < min(row_range) : continue
+					elif i > max(row_range) : break
+				
+				# Update the iteration index.
+				self.ite = i
+				print('{}/{} iterations: {}'.format(i+1, n, doc['eid']))
 				self.add_an_entry_to_log_file(self.log_file, 
-				'Error is: {}'.format(error))
-
-				# Save the log files.
-				if self.debug_affiliation_search:
-					self.dump_log_files(additional_logs=[self.additional_logs], 
-						names_for_additional_logs=['./data/outputs/debug_logs/step_by_step_log.json'])
-				else:
-					self.dump_log_files()
-			# Log the report entry for the current paper.
-			self.add_an_entry_to_log_file(self.report_file, copy.deepcopy(self.report_entry))
-			self.update_dictionary_fields(input_dict=self.report_entry, reset_value=True)
-
-
-		# Save the log files.
-		if self.debug_affiliation_search:
-			self.dump_log_files(additional_logs=[self.additional_logs], 
-				names_for_additional_logs=['./data/outputs/debug_logs/step_by_step_log.json'])
-		else:
-			self.dump_log_files()
+					'{}/{} iterations: {}'.format(i+1, n, doc['eid']))
+				# Process the corresponding paper.
+				try:
+					self.process_one_paper(doc)
+				except Exception as error:
+					print('Error processing paper: {}. Log saved.'.format(doc['eid']))
+					self.add_an_entry_to_log_file(self.log_file, 
+					'Error is: {}'.format(error))
+
+					# Save the log files. The whole logs are rewritten, so they are saved at most once every dump_every papers.
+					if i - last_dump >= dump_every:
+						last_dump = i
+						if self.debug_affiliation_search:
+							self.dump_log_files(additional_logs=[self.additional_logs], 
+								names_for_additional_logs=['./data/outputs/debug_logs/step_by_step_log.json'])
+						else:
+							self.dump_log_files()
+						self.save_hal_caches()
+				# Log the report entry for the current paper.
+				report_entry = copy.deepcopy(self.report_entry)
+				self.add_an_entry_to_log_file(self.report_file, report_entry)
+				self.update_dictionary_fields(input_dict=self.report_entry, reset_value=True)
+				if self.pending_upload is not None:
+					pending_uploads.append((doc['eid'], self.pending_upload, report_entry))
+					self.pending_upload = None
+				record_uploads()
+
+		finally:
+			# An upload started for a paper whose report entry was not logged yet is written to the current report entry.
+			if self.pending_upload is not None:
+				pending_uploads.append((self.report_entry['eid'], self.pending_upload, self.report_entry))
+				self.pending_upload = None
+			# Wait for the remaining uploads, and write their results to the report.
+			record_uploads(wait=True)
+			if self.upload_executor is not None:
+				self.upload_executor.shutdown()
+				self.upload_executor = None
+
+			# Save the log files.
+			if self.debug_affiliation_search:
+				self.dump_log_files(additional_logs=[self.additional_logs], 
+					names_for_additional_logs=['./data/outputs/debug_logs/step_by_step_log.json'])
+			else:
+				self.dump_log_files()
+			# Save the HAL references and journal domains, for the next runs.
+			self.save_hal_caches()
 
 
 	def process_one_paper(self, doc):
@@ -726,7 +1485,7 @@ class AutomateHal:
 		# Create a paper information treator.
 		paper_info_handler = TreatPaperInformation(
 			mode=self.mode, debug_affiliation_search=self.debug_affiliation_search, AuthDB=self.AuthDB,
-			log_file=self.log_file, debug_log_file=self.debug_log_file, report_entry=self.report_entry)
+			log_file=self.log_file, debug_log_file=self.debug_log_file, report_entry=self.report_entry, orcid_cache=self.orcid_cache, doi_hit_cache=self.doi_hit_cache, abstract_cache=self.abstract_cache, title_hit_cache=self.title_hit_cache, hal_cache_expire=self.hal_cache_expire)
 
 		# Get the docids and document type.
 		paper_info_handler.extract_docids_and_doc_type(doc)
@@ -741,6 +1500,8 @@ class AutomateHal:
 			if paper_info_handler.verify_if_existed_in_hal(doc):
 				self.add_an_entry_to_log_file(self.log_file, 'Process finished: Already exist in HAL.')
 				self.report_entry['exit_state'] = 'Already in HAL'
+				# The Scopus record of the paper is not needed: Drop it if it was prefetched.
+				self.abstract_cache.pop(paper_info_handler.doc_data['eid'], None)
 				return
 		# If debug_affiliation_search is True, skip the hal existance check:
 		else:
@@ -756,8 +1517,7 @@ class AutomateHal:
 		paper_info_handler.extract_complementary_paper_information(ab)
 
 		# Write author emails to the report, if there are any.	
-		emails = [elem["mail"] for elem in paper_info_handler.auths if elem["mail"]]
-		self.report_entry['emails_auths'] = ", ".join(emails)
+		self.report_entry['emails_auths'] = ", ".join(elem["mail"] for elem in paper_info_handler.auths if elem.get("mail"))
 
 		# Search the affiliations in HAL and get the ids.
 
@@ -794,7 +1554,11 @@ class AutomateHal:
 
 		# Upload to HAL.
 		if not self.debug_affiliation_search:
-			self.hal_upload(filepath=tei_producer.xml_path)
+			if self.upload_executor is None:
+				self.hal_upload(filepath=tei_producer.xml_path)
+			else:
+				# Upload in the background, while the next papers are processed.
+				self.pending_upload = self.upload_executor.submit(self.post_tei_to_hal, tei_producer.xml_path)
 		else:
 			self.add_an_entry_to_log_file(self.log_file, 'Skip Hal uploading because we are in debug affiliation search mode.')
 			self.update_dictionary_fields(self.report_entry, fields=['exit_state'], values=['TEI-XML file generated but HAL uploading skip as we are in debug affiliation mode.'])
@@ -811,7 +1575,7 @@ class TreatPaperInformation(AutomateHal):
 	All the attributes are inherent from parents
 	
 	'''
-	def __init__(self, mode='search_query', debug_affiliation_search=False, AuthDB=[], log_file=[], debug_log_file=[], report_entry=[]):
+	def __init__(self, mode='search_query', debug_affiliation_search=False, AuthDB=[], log_file=[], debug_log_file=[], report_entry=[], orcid_cache=None, doi_hit_cache=None, abstract_cache=None, title_hit_cache=None, hal_cache_expire=30*24*3600):
 		'''
 		### `__init__` Method
 		#### Description:
@@ -823,6 +1587,11 @@ class TreatPaperInformation(AutomateHal):
 		- `AuthDB` (list): A list of dictionaries that stores user-defined data to refine the search results. Each dictionary may contain additional information or preferences for the search process.
 		- `log_file` (list): List to store log file paths. Log files contain general information and events during the execution of the object.
 		- `debug_log_file` (list): List to store debug log file paths. Debug log files contain detailed debugging information for troubleshooting.	
+		- `orcid_cache` (dict): ORCIDs of the Scopus authors already looked up in the current run.
+		- `doi_hit_cache` (dict): Results of the batch DOI searches in HAL in the current run.
+		- `abstract_cache` (dict): Records from the Abstract Retrieval API prefetched in the current run.
+		- `title_hit_cache` (dict): Results of the title searches in HAL in the current run.
+		- `hal_cache_expire` (int): Validity, in seconds, of the ORCIDs saved by the previous runs.
 
 		#### Defaults:
 		- `mode='search_query'`
@@ -830,8 +1599,13 @@ class TreatPaperInformation(AutomateHal):
 		- `AuthDB=[]`
 		- `log_file=[]`
 		- `debug_log_file=[]`
+		- `orcid_cache=None`
+		- `doi_hit_cache=None`
+		- `abstract_cache=None`
+		- `title_hit_cache=None`
+		- `hal_cache_expire=30*24*3600`
 		'''
-		super().__init__(mode=mode, debug_affiliation_search=debug_affiliation_search, AuthDB=AuthDB, log_file=log_file, debug_log_file=debug_log_file, report_entry=report_entry)		 
+		super().__init__(mode=mode, debug_affiliation_search=debug_affiliation_search, AuthDB=AuthDB, log_file=log_file, debug_log_file=debug_log_file, report_entry=report_entry, orcid_cache=orcid_cache, doi_hit_cache=doi_hit_cache, abstract_cache=abstract_cache, title_hit_cache=title_hit_cache, hal_cache_expire=hal_cache_expire)		 
 	
 
 	def debug_affiliation_hal(self):
@@ -926,23 +1700,51 @@ class TreatPaperInformation(AutomateHal):
 
 		# Get the author list
 		auths = self.auths
+		AuthDB = self.AuthDB if isinstance(self.AuthDB, dict) else {}
+		if not AuthDB:
+			return
+		normalize = self.normalize_author_name
 		# Iterate over the authors, and enrich the author data.
 		for item in auths:
-			key = item['surname'] + ' ' + item['initial']
-			if key in self.AuthDB:
-				# Use 'forename' to verify the authors.
-				if item['forename'] != self.AuthDB[key]['forename']: # If not matching, do nothing.
-					print(f"!!warning: forename mismatch for {key}: {item['forename']} vs {self.AuthDB[key]['forename']}")
+			# Look up by the normalized key, then by surname and forename.
+			key = normalize('{} {}'.format(item['surname'], item['initial']))
+			forename = normalize(item['forename']) if isinstance(item['forename'], str) else None
+			row = AuthDB.get(key)
+			if row is None and forename is not None:
+				row = AuthDB.get((normalize(item['surname']), forename))
+			if row is not None:
+				# Use 'forename' to verify the authors. Accents and case are ignored.
+				if forename != normalize(row['forename']): # If not matching, do nothing.
+					print(f"!!warning: forename mismatch for {key}: {item['forename']} vs {row['forename']}")
 				else: # If mathing, get the affil_id and idHAL from database.
-					fields = ['affil_id', 'idHAL', 'mail']
 					# If nothing from Scopus but present in the local database, then add values
-					for f in fields:
-						# If nothing is present, enrich with author database
-						if not item[f]:
-							item[f] = self.AuthDB[key][f]
+					item.update({f: row[f] for f in ('affil_id', 'idHAL', 'mail') if not item[f]})
 		self.auths = auths
 
 
+	def get_orcid(self, auid):
+		"""
+		Get the ORCID of an author from the Author Retrieval API. The ORCIDs are cached on disk in self.scopus_cache_path, 
+		so that an author is requested only once every self.hal_cache_expire seconds, and in memory in self.orcid_cache for the current run.
+
+		Parameters:
+		- auid (str): Scopus id of the author.
+
+		Returns:
+		str or bool: The ORCID of the author, or False if the author has no ORCID.
+		"""
+		orcid = self.orcid_cache.get(auid)
+		if orcid is None:
+			key = 'orcid:{}'.format(auid)
+			with shelve.open(self.scopus_cache_path) as cache:
+				orcid = self.read_cached_orcid(cache, key)
+				if orcid is None:
+					orcid = AuthorRetrieval(auid).orcid or False
+					cache[key] = (orcid, time.time())
+				self.orcid_cache[auid] = orcid
+		return orcid
+
+
 	def extract_author_infomation(self):
 		"""
 		Extracts author information for the authors in a give paper, and then update the information in self.auths.
@@ -953,55 +1755,60 @@ class TreatPaperInformation(AutomateHal):
 		- ab: An object containging the paper details from the Abstract Retrival API.
 		"""      
 
-		# Get details for each paper using AbstractRetrieval API.
-		ab = AbstractRetrieval(self.doc_data['eid'], view='FULL')
+		# Get details for each paper using AbstractRetrieval API, unless the record was prefetched.
+		ab = self.abstract_cache.pop(self.doc_data['eid'], None)
+		if ab is None:
+			ab = AbstractRetrieval(self.doc_data['eid'], view='FULL')
 		authors = ab.authorgroup
 
 		# Initialize an empty list to store author information
 		auths = []        
+		# Index in auths of each author already seen, by (surname, forename).
+		seen = {}
+		# ORCIDs given in the record: The other ones are requested from the Author Retrieval API.
+		orcids_from_abstract = self.get_orcids_from_abstract(ab)
+		# Request the other ones in parallel, if they were not prefetched with the record.
+		self.prefetch_orcids([auth.auid for auth in authors if auth.auid not in orcids_from_abstract])
 		# Iterate through each author in the list
-		for auth_idx in range(len(authors)):
-			duplicated = False # Flag to identify duplicated authors.
-			# Parse author name info:            
-			auth = authors[auth_idx]           
-			# Get the different fields.
+		for auth in authors:
+			# Parse author name info and the affiliation, once per author.
 			surname = auth.surname
-			indexed_name = auth.indexed_name
 			auth_forename = auth.given_name
-			initial = indexed_name[len(surname)+1:]            
-
-			# Get the ORCID.
-			orcid = AuthorRetrieval(authors[auth_idx].auid).orcid                 
-			if orcid is None:
-				orcid = False
+			initial = auth.indexed_name[len(surname)+1:]            
+			auid = auth.auid
+			organization = auth.organization
+			city = auth.city
+			country = auth.country
+			addresspart = auth.addresspart
+			postalcode = auth.postalcode
 
 			# Check if the author exists in auths but only with a different affiliation.
-			for i in range(len(auths)):
-				tmp_auth = auths[i]
-				if surname == tmp_auth['surname'] and auth_forename == tmp_auth['forename']:
-					auths[i]['affil'].append(auth.organization)
-					auths[i]['affil_country'].append(auth.city)
-					auths[i]['affil_address'].append(auth.addresspart)
-					auths[i]['affil_postalcode'].append(auth.postalcode)
-					auths[i]['affil_city'].append(auth.city)
-					duplicated = True
-					break                
-
+			idx = seen.get((surname, auth_forename))
+			if idx is not None:
+				tmp_auth = auths[idx]
+				tmp_auth['affil'].append(organization)
+				tmp_auth['affil_country'].append(country)
+				tmp_auth['affil_address'].append(addresspart)
+				tmp_auth['affil_postalcode'].append(postalcode)
+				tmp_auth['affil_city'].append(city)
 			# Append author information to the list
-			if not duplicated:
+			else:
+				seen[(surname, auth_forename)] = len(auths)
+				# Get the ORCID.
+				orcid = orcids_from_abstract.get(auid) or self.get_orcid(auid)
 				auths.append({
 					'surname': surname,
 					'initial': initial,
 					'forename': auth_forename,
-					'scopusId': authors[auth_idx].auid,
+					'scopusId': auid,
 					'orcid': orcid,
 					'mail': False,
 					'corresp': False,
-					'affil': [auth.organization],
-					'affil_city': [auth.city],
-					'affil_country': [auth.country],
-					'affil_address': [auth.addresspart],
-					'affil_postalcode': [auth.postalcode],
+					'affil': [organization],
+					'affil_city': [city],
+					'affil_country': [country],
+					'affil_address': [addresspart],
+					'affil_postalcode': [postalcode],
 					'affil_id': '',
 					'affil_id_invalid': '',
 					'affil_status': [],
@@ -1012,11 +1819,14 @@ class TreatPaperInformation(AutomateHal):
 		# Check corresponding author.        
 		correspondanes = ab.correspondence
 		if correspondanes:
+			# Index the authors by (surname, initial), keeping the first one as the loop over the authors did.
+			auths_by_initial = {}
+			for item in auths:
+				auths_by_initial.setdefault((item["surname"], item["initial"]), item)
 			for correspond in correspondanes:
-				for item in auths:
-					if item["surname"] == correspond.surname and item["initial"] == correspond.initials:
-						item["corresp"] = True
-						break  # Stop iterating once the match is found                       
+				item = auths_by_initial.get((correspond.surname, correspond.initials))
+				if item is not None:
+					item["corresp"] = True
 		self.auths = auths
 
 		return ab				
@@ -1058,24 +1868,12 @@ class TreatPaperInformation(AutomateHal):
 
 		Returns: True - Match found, False - No match found.
 		"""
-		# Dictionary mapping Scopus document types to HAL document types
-		doctype_scopus2hal = {
-			'Article': 'ART', 'Article in press': 'ART', 'Review': 'ART', 'Business article': 'ART',
-			"Data paper": "ART", "Data Paper": "ART",
-			'Conference paper': 'COMM', 'Conference Paper': 'COMM',
-			'Conference review': 'COMM', 'Conference Review': 'COMM',
-			'Book': 'OUV', 'Book chapter': 'COUV', 'Book Chapter': 'COUV', 'Editorial': 'ART', 'Short Survey': 'ART',
-			'Journal': 'ART', 'Conference Proceeding': 'COMM', 'Book Series': 'OUV'
-		}
-
 		# Check if the provided Scopus document type is in the mapping
-		# If supported, add the paper type in docid.
-		if doctype in doctype_scopus2hal.keys():
-			# Set the corresponding HAL document type
-			doctype = doctype_scopus2hal[doctype]
-			return True, doctype
-		else:			
+		# If supported, return the corresponding HAL document type.
+		hal_doctype = DOCTYPE_SCOPUS2HAL.get(doctype.lower()) if isinstance(doctype, str) else None
+		if hal_doctype is None:
 			return False, doctype
+		return True, hal_doctype
 
 
 	def verify_if_existed_in_hal(self, doc):
@@ -1090,8 +1888,13 @@ class TreatPaperInformation(AutomateHal):
 		"""
 
 		# Verify if the publication existed in HAL.
-		# First check by doi:
-		idInHal = self.reqWithIds(self.doc_data['doi'])	
+		# First check by doi: Use the results of the batch search if the doi was in it.
+		doi = self.doc_data['doi']
+		if isinstance(doi, str) and doi.lower() in self.doi_hit_cache:
+			hal_doc = self.doi_hit_cache[doi.lower()]
+			idInHal = [1, [hal_doc]] if hal_doc else [0, []]
+		else:
+			idInHal = self.reqWithIds(doi)
 		
 		if idInHal[0] > 0:
 			print(f"already in HAL")
@@ -1099,8 +1902,9 @@ class TreatPaperInformation(AutomateHal):
 			self.report_entry['hal_id'] = idInHal[1][0]['docid']
 
 			return True
-		else: # Then, check with title
-			titleInHal = self.reqWithTitle(doc['title'])
+		else: # Then, check with title: Use the results of the parallel search if the title was in it.
+			title = doc['title']
+			titleInHal = self.title_hit_cache[title] if title in self.title_hit_cache else self.reqWithTitle(title)
 			if titleInHal[0] > 0:
 				print(f"already in HAL")
 				self.report_entry['hal_url'] = titleInHal[1][0]['uri_s']
@@ -1459,6 +2263,9 @@ class SearchAffilFromHal(AutomateHal):
 
 		'''
 
+		# Send the HAL searches of all the affiliations in parallel first: The search below then reads them from the cache.
+		self.prefetch_structures()
+
 		# Start searching the affiliation in HAL.
 		auths = self.auths
 		for auth_idx, aut in enumerate(auths):
@@ -1497,6 +2304,83 @@ class SearchAffilFromHal(AutomateHal):
 					
 
 
+	def prefetch_structures(self, max_workers=8):
+		'''
+		Search in HAL, in parallel, the valid structures for the units of all the affiliations of the paper.
+		The results are memoized by reqHalRef, so that search_hal_and_filter_results does not wait for HAL for each unit.
+		The affiliations of the authors defined in AuthDB, or already in the historical database, are skipped.
+
+		Parameters:
+		- max_workers (int): Maximal number of HAL requests in flight (default: 8).
+		'''
+
+		def search_unit(affil_unit):
+			# Errors are ignored here: The search is done again, with its error handling, in search_hal_and_filter_results.
+			try:
+				return self.reqHalRef(ref_name='structure', 
+						search_query='(text:({}) valid_s:"VALID")'.format(affil_unit), 
+						return_field='&fl=docid,label_s,address_s,country_s,parentName_s,parentDocid_i,parentValid_s&wt=json&rows=100')
+			except Exception:
+				return [0, []]
+
+		known_affils = set(self.affiliation_db['affil_name'].dropna().astype(str).str.lower())
+		affil_units = set()
+		for aut in self.auths:
+			if aut['affil_id']:
+				continue
+			# Preprocess a copy of the affiliations: The search preprocesses them again.
+			aut_affils = copy.deepcopy(aut['affil'])
+			for affil_idx, affil_name in enumerate(aut['affil']):
+				if not isinstance(affil_name, str) or affil_name.lower() in known_affils:
+					continue
+				affil_country = self.generate_abbreviation(aut['affil_country'][affil_idx])
+				aut_affil = self.preprocess_affiliation_name(aut_affils, affil_idx, affil_country)
+				if isinstance(aut_affil, str):
+					affil_units.update(self.generate_affil_list(aut_affil))
+
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			search_results = list(executor.map(search_unit, affil_units))
+
+		# The names of the valid parents are requested one by one by add_parent_affil_ids: Get them by batches instead.
+		parent_ids = set()
+		for search_result in search_results:
+			for doc in search_result[1]:
+				for parent_id, parent_valid in zip(doc.get('parentDocid_i', []), doc.get('parentValid_s', [])):
+					if parent_valid == 'VALID':
+						parent_ids.add(parent_id)
+		self.prefetch_structure_names(parent_ids)
+
+
+	def prefetch_structure_names(self, docids, batch_size=50):
+		'''
+		Search in HAL the names of structures given by their docids, with one request per batch of batch_size docids.
+		Each name is memoized as the result of the request by docid made by reqHalRef, so that the later requests for 
+		a single docid are served from the cache.
+
+		Parameters:
+		- docids (iterable): The docids of the structures. The ones already in the cache are skipped.
+		- batch_size (int): Maximal number of docids per request (default: 50).
+		'''
+
+		return_field = '&fl=label_s&wt=json'
+		keys = {docid: self.hal_ref_key('structure', '(docid:{})'.format(docid), return_field) for docid in docids}
+		missing = sorted(docid for docid, key in keys.items() if key not in AutomateHal.hal_ref_cache)
+
+		for start in range(0, len(missing), batch_size):
+			batch = missing[start:start+batch_size]
+			# Errors are ignored here: The names not found are requested again one by one, with their error handling.
+			try:
+				_, docs = self.reqHal(search_category='ref/structure', 
+						search_query='docid:({})'.format(' OR '.join(str(docid) for docid in batch)), 
+						suffix='&fl=docid,label_s&wt=json&rows={}'.format(len(batch)))
+			except Exception:
+				continue
+			for doc in docs:
+				key = keys.get(doc['docid'])
+				if key is not None:
+					AutomateHal.hal_ref_cache[key] = [1, [{'label_s': doc['label_s']}]]
+
+
 	# If too many candidates with parents, we drop this item as we are not sure to achieve confident extraction.
 	# We count the number of parent institutions. If too many, this indicates that it is better to look at parent affiliations.
 	def filter_by_affil_city(self, df_affli_found, affil_city, exact_filter=False):
@@ -1571,30 +2455,23 @@ class SearchAffilFromHal(AutomateHal):
 			- df_affli_found: After removal.
 		'''
 
-		# Function to check if a row is a child of other rows.
-		def not_child(row):
-			other_rows = df_affli_found[df_affli_found.index != row.name]  # Exclude the current row
-			if 'parentDocid_i' in row.index:
-				parent_ids = row['parentDocid_i']
-				if isinstance(pd.isna(parent_ids), bool):
-					if pd.isna(parent_ids):
-						return True								
-				else:
-					if all(pd.isna(parent_ids)):
-						return True
-			
-				for _, other_row in other_rows.iterrows():
-					if other_row['docid'] in parent_ids:
-						return False
-					
-			return True
-
+		# Function to check if the parents of a row are all missing.
+		def no_parent(parent_ids):
+			if isinstance(pd.isna(parent_ids), bool):
+				return pd.isna(parent_ids)
+			return all(pd.isna(parent_ids))
 
-		if not df_affli_found.empty:
-			# Apply the function to identify the child affiliations.
+		if not df_affli_found.empty and 'parentDocid_i' in df_affli_found.columns:
+			# Identify the child affiliations: A row is a child if the docid of another row is one of its parents.
+			# The columns are read once as lists, instead of building a Series for each pair of rows.
+			docids = df_affli_found['docid'].tolist()
 			flag = []
-			for i in range(len(df_affli_found)):
-				flag.append(not_child(df_affli_found.iloc[i]))
+			for i, parent_ids in enumerate(df_affli_found['parentDocid_i'].tolist()):
+				if no_parent(parent_ids):
+					flag.append(True)
+				else:
+					parent_ids = set(parent_ids)
+					flag.append(not any(docid in parent_ids for j, docid in enumerate(docids) if j != i))
 
 			df_affli_found = df_affli_found[flag]
 
@@ -1607,13 +2484,16 @@ class SearchAffilFromHal(AutomateHal):
 
 		if not df_affli_found.empty:
 			# Check in the remaining candidates, if the authors appeared in HAL with the candidate affiliation before.
+			# The docids are read once as a list: No Series is built for each candidate.
+			auth_name = '{} {}'.format(aut['forename'], aut['surname'])
 			flag = []
-			for i in range(len(df_affli_found)):
-				search_query = 'structId_i:{}&fq=auth_t:"{} {}"'.format(df_affli_found.iloc[i]['docid'], aut['forename'], aut['surname'])
+			for docid in df_affli_found['docid'].tolist():
+				search_query = 'structId_i:{}&fq=auth_t:"{}"'.format(docid, auth_name)
 				num, _ = self.reqHal(search_query=search_query)
 				flag.append(num)
-			if max(flag)>0:
-				max_index = flag.index(max(flag))
+			max_num = max(flag)
+			if max_num>0:
+				max_index = flag.index(max_num)
 				
 				affi_exist_in_hal = True
 				best_affil_dict = df_affli_found.iloc[max_index].to_dict()
@@ -1800,22 +2680,14 @@ class SearchAffilFromHal(AutomateHal):
 
 	# Define a function to sort df_affli_found based on the number of words in the affliation name.
 	def sort_by_name_length(self, df):																			
-		# Function to calculate the number of words in a string
-		def count_words(text):
-			cleaned_text = re.sub(r'\[.*?\]', '', text)
-			return len(cleaned_text.split())
-
+		# Sort the rows by the number of words in 'label_s', not counting the acronyms in brackets.
+		# The counts are computed by vectorized string operations, and used as sort key without adding a column to df.
 		if df.empty:
 			return df
-		else:										
-			# Add a new column 'word_count' with the number of words in 'label_s'
-			df['word_count'] = df['label_s'].apply(count_words)
-			# Sort the DataFrame based on the 'word_count' column
-			df_sorted = df.sort_values(by='word_count').reset_index(drop=True)
-			# Drop the 'word_count' column if you don't need it in the final result
-			df_sorted = df_sorted.drop(columns='word_count')
-
-		return df_sorted
+
+		word_counts = df['label_s'].str.replace(r'\[.*?\]', '', regex=True).str.split().str.len()
+
+		return df.iloc[np.argsort(word_counts.to_numpy(), kind='stable')].reset_index(drop=True)
 	
 
 	def return_callback_func(self, affi_exist_in_hal=False, best_affil_dict={}):													
@@ -1985,14 +2857,14 @@ class SearchAffilFromHal(AutomateHal):
 
 			if not df_affli_found.empty:
 				affi_exist_in_hal = True
-				best_affil_dict = df_affli_found.iloc[0].to_dict()
 				
 				# If there are still multiple choices, we prefer the affiliation with parents identical to existing affiliations.
+				# Single scan of the column, stopping at the first row with parents. Otherwise, the first row is taken.
+				best_idx = 0
 				if 'parentName_s' in df_affli_found.columns:
-					for i in range(len(df_affli_found)):
-						if isinstance(df_affli_found.iloc[i]['parentName_s'], str) or isinstance(df_affli_found.iloc[i]['parentName_s'], list):
-							best_affil_dict = df_affli_found.iloc[i].to_dict()
-							break
+					best_idx = next((i for i, parent_name in enumerate(df_affli_found['parentName_s'].tolist()) 
+						if isinstance(parent_name, (str, list))), 0)
+				best_affil_dict = df_affli_found.iloc[best_idx].to_dict()
 								
 				return self.return_callback_func(affi_exist_in_hal, best_affil_dict)
 			else:
@@ -2020,16 +2892,12 @@ class SearchAffilFromHal(AutomateHal):
 			return output
 		
 
-		# Create the dataframe
-		for i in range(len(search_result[1])):
-			if i == 0:
-				df_affli_found = pd.DataFrame([search_result[1][i]])
-			else:
-				df_affli_found = pd.concat([df_affli_found, pd.DataFrame([search_result[1][i]])], ignore_index=True)
+		# Create the dataframe, at once from the list of documents.
+		df_affli_found = pd.DataFrame(search_result[1])
 
 		# Preprocess df_affli_found['label_s'] and affil_name: Lower case and french words -> english words.
 		df_affli_found['label_s_ori'] = df_affli_found['label_s']
-		df_affli_found['label_s'] = df_affli_found['label_s'].apply(self.preprocess_affil_name)
+		df_affli_found['label_s'] = df_affli_found['label_s'].map(self.preprocess_affil_name)
 		affil_name = self.preprocess_affil_name(affil_name)
 
 		# Sort by name lengh.
@@ -2146,6 +3014,11 @@ class SearchAffilFromHal(AutomateHal):
 
 
 class GenerateXMLTree(AutomateHal):
+	# Content of the sample tree, read once from the disk and parsed for each paper.
+	tei_template = None
+	# Matching of the Scopus languages to the HAL languages, read once from the disk.
+	match_language = None
+
 	def __init__(self, doc, auths=None, doc_data=None, debug_affiliation_search=False, debug_hal_upload=False, mode='search query', stamps=[], allow_create_new_affiliation=False):
 		super().__init__(mode=mode, debug_affiliation_search=debug_affiliation_search, debug_hal_upload=debug_hal_upload, stamps=stamps, 
 				   auths=auths, doc_data=doc_data, allow_create_new_affiliation=allow_create_new_affiliation)
@@ -2171,11 +3044,10 @@ class GenerateXMLTree(AutomateHal):
 		self.xml_tree = None # The produced xml tree.
 		self.xmi_tree_root = None # Root of the tree.
 		self.xml_path = '' # Path of the generated tree.
-		self.biblFullPath = 'tei:text/tei:body/tei:listBibl/tei:biblFull' # Path in the xml tree related to biblfull section.
-		self.biblStructPath = self.biblFullPath+'/tei:sourceDesc/tei:biblStruct' # Path in the xml tree related to biblstructure section.
-		self.xml_tree_name_space = {'tei':'http://www.tei-c.org/ns/1.0'} # Name space of the xml-tree
+		self.xml_tree_name_space = TEI_NS # Name space of the xml-tree
 		self.new_affiliation_idx = 0 # Index for the manually added affiliations.
-		self.new_affiliation = [] # List of all the existing manually added affiliations.
+		self.new_affiliation = {} # Index of each manually added affiliation, by affiliation name.
+		self.xml_sections = {} # Sections of the xml tree edited by the parse functions, found once per tree.
 
 
 		self.prepare_data_for_tei_tree(doc)
@@ -2271,40 +3143,23 @@ class GenerateXMLTree(AutomateHal):
 		'''
 
 		# Dealing with special characters:
-		aut_affil = re.sub(r'&amp;', '& ', aut_affil)
-
-		# If it is the first new affiliation, create directly.
-		if self.new_affiliation_idx == 0:
-			self.new_affiliation_idx += 1 # Update the index.
+		aut_affil = aut_affil.replace('&amp;', '& ')
+
+		# Search if it has been created by us before: If yes, make reference to it.
+		idx = self.new_affiliation.get(aut_affil)
+		if idx is None: # If not created, create a new one.
+			# Update the index.
+			self.new_affiliation_idx += 1
+			idx = self.new_affiliation[aut_affil] = self.new_affiliation_idx
 			# Create the new organization.
 			eBackOrg_i = ET.SubElement(eListOrg, 'org')
 			eBackOrg_i.set('type', 'institution')
-			eBackOrg_i.set('xml:id', 'localStruct-' + str(self.new_affiliation_idx))
+			eBackOrg_i.set('xml:id', 'localStruct-' + str(idx))
 			eBackOrg_i_name = ET.SubElement(eBackOrg_i, 'orgName')
 			eBackOrg_i_name.text = aut_affil
-			self.new_affliation.append(aut_affil)
-			# Make reference to the created affliation.
-			eAffiliation_manual = ET.SubElement(eAuth, 'affiliation')				
-			eAffiliation_manual.set('ref', 'localStruct-' + str(self.new_affiliation_idx))
-		else: # If it is not the first new affiliation, search if it has been created by us before.
-			try:
-				idx = self.new_affliation.index(aut_affil)
-				# If it has been created, make reference to it.
-				eAffiliation_manual = ET.SubElement(eAuth, 'affiliation')				
-				eAffiliation_manual.set('ref', 'localStruct-' + str(idx+1))	
-			except ValueError: # If not created, create a new one.
-				# Update the index.
-				self.new_affiliation_idx += 1
-				# Create the new organization.
-				eBackOrg_i = ET.SubElement(eListOrg, 'org')
-				eBackOrg_i.set('type', 'institution')
-				eBackOrg_i.set('xml:id', 'localStruct-' + str(self.new_affiliation_idx))
-				eBackOrg_i_name = ET.SubElement(eBackOrg_i, 'orgName')
-				eBackOrg_i_name.text = aut_affil
-				self.new_affliation.append(aut_affil)	
-				# Make reference to the created affliation.
-				eAffiliation_manual = ET.SubElement(eAuth, 'affiliation')				
-				eAffiliation_manual.set('ref', 'localStruct-' + str(self.new_affiliation_idx))
+		# Make reference to the affliation.
+		eAffiliation_manual = ET.SubElement(eAuth, 'affiliation')				
+		eAffiliation_manual.set('ref', 'localStruct-' + str(idx))
 
 
 
@@ -2336,9 +3191,11 @@ class GenerateXMLTree(AutomateHal):
 			scopus_lang = self.doc_data['language'].split(";")[0]
 		else:
 			scopus_lang = 'und'
-		with open("./data/matchLanguage_scopus2hal.json") as fh:
-			matchlang = json.load(fh)
-			doc_data_for_tei["language"] = matchlang.get(scopus_lang, "und")
+		# The matching is loaded once, for the first paper. The file has non-ASCII names: Read it as UTF-8 on every platform.
+		if GenerateXMLTree.match_language is None:
+			with open("./data/matchLanguage_scopus2hal.json", encoding='utf-8') as fh:
+				GenerateXMLTree.match_language = json.load(fh)
+		doc_data_for_tei["language"] = GenerateXMLTree.match_language.get(scopus_lang, "und")
 
 
 		self.get_funding_for_tei_tree(doc)
@@ -2383,15 +3240,11 @@ class GenerateXMLTree(AutomateHal):
 		# Find HAL domain
 		doc_data_for_tei['domain'] = None 
 
-		# Query HAL with journalId to retrieve domain
-		if doc_data_for_tei['journalId']:
-			prefix = 'http://api.archives-ouvertes.fr/search/?rows=0'
-			suffix = '&facet=true&facet.field=domainAllCode_s&facet.sort=count&facet.limit=2'
-			req = requests.get(prefix + '&q=journalId_i:' + doc_data_for_tei['journalId'] + suffix)
+		# Query HAL with journalId to retrieve domain. reqHalJournalDomain does not query again the journals already searched.
+		journal_id = doc_data_for_tei['journalId']
+		if journal_id:
 			try:
-				req = req.json()
-				if req["response"]["numFound"] > 9:  # Retrieve domain from journal if there are more than 9 occurrences
-					doc_data_for_tei['domain'] = req['facet_counts']['facet_fields']['domainAllCode_s'][0]
+				doc_data_for_tei['domain'] = self.reqHalJournalDomain(journal_id)
 			except:
 				print('\t Warning: HAL API did not work for retrieving domain with journal')
 				self.add_an_entry_to_log_file(self.log_file, 'Warning: HAL API did not work for retrieving domain with journal')
@@ -2416,19 +3269,11 @@ class GenerateXMLTree(AutomateHal):
 		doc_issn = doc['issn']
 		if doc_issn and isinstance(doc_issn, str):
 			# Format ISSN
-			zeroMissed = 8 - len(doc_issn)
-			issn = ("0" * zeroMissed + doc_issn) if zeroMissed > 0 else doc_issn
-			issn = issn[0:4] + '-' + issn[4:]
+			issn = self.format_issn(doc_issn)
 
 			# Query HAL to get journalId from ISSN
 			reqIssn = self.reqHalRef(ref_name='journal', 
 						search_query='(text:({}) valid_s:"VALID")'.format(issn))
-
-			# prefix = 'http://api.archives-ouvertes.fr/ref/journal/?'
-			# suffix = '&fl=docid,valid_s,label_s'
-			# req = requests.get(prefix + 'q=issn_s:' + issn + suffix)
-			# req = req.json()
-			# reqIssn = [req['response']['numFound'], req['response']['docs']]
 			
 			# If journals found, get the first journalId
 			if reqIssn[0] > 0:
@@ -2490,7 +3335,6 @@ class GenerateXMLTree(AutomateHal):
 		root = tree.getroot()
 
 		# Add name space and header.
-		ET.register_namespace('', "http://www.tei-c.org/ns/1.0")
 		root.attrib["xmlns:hal"] = "http://hal.archives-ouvertes.fr/"
 
 		base_path = './data/outputs/TEI/'
@@ -2503,11 +3347,13 @@ class GenerateXMLTree(AutomateHal):
 		xml_path = base_path + doc_id + ".xml"
 		
 		# Export the tree.
-		ET.indent(tree, space="\t", level=0)
-		tree.write(xml_path,
-				xml_declaration=True,
-				encoding="utf-8",
-				short_empty_elements=False)
+		# The tree is not indented: HAL does not need it, and it costs a walk over the whole tree per paper.
+		# The 1 MiB buffer gathers the many small writes of ElementTree into a few system calls.
+		with open(xml_path, 'wb', buffering=1<<20) as xmlfh:
+			tree.write(xmlfh,
+					xml_declaration=True,
+					encoding="utf-8",
+					short_empty_elements=False)
 		
 		self.xml_path = xml_path
 
@@ -2518,16 +3364,28 @@ class GenerateXMLTree(AutomateHal):
 		'''
 
 		# Load the sample tree and get the root node.
-		try:
-			self.xml_tree = ET.parse('./data/tei_modele.xml')			
-		except:
-			raise ValueError('Error: XML file not found!')
+		# The file is read only for the first paper: The next ones parse the content kept in memory.
+		# Parsing the bytes with the C parser is faster than a copy.deepcopy of a parsed template tree.
+		if GenerateXMLTree.tei_template is None:
+			try:
+				with open('./data/tei_modele.xml', 'rb') as fh:
+					GenerateXMLTree.tei_template = fh.read()
+			except:
+				raise ValueError('Error: XML file not found!')
+		self.xml_tree = ET.ElementTree(ET.fromstring(GenerateXMLTree.tei_template))
 
 		self.xmi_tree_root = self.xml_tree.getroot()
 
-		# Register name space.
-		ET.register_namespace('',"http://www.tei-c.org/ns/1.0")
-		
+		# Find the sections of the tree once, each one from its parent section: The parse functions use them directly.
+		# The paths are the module constants of TEI_SECTIONS: No path is built per paper.
+		sections = {}
+		for name, parent, path in TEI_SECTIONS:
+			start = sections[parent] if parent else self.xmi_tree_root
+			sections[name] = start.find(path, TEI_NS)
+			if sections[name] is None:
+				raise ValueError('Error: Section {} not found in the XML file!'.format(name))
+		self.xml_sections = sections
+
 		# Generate different part of the tree: 
 		# - Identify the related part.
 		# - Remove the contents in the sample.
@@ -2549,63 +3407,55 @@ class GenerateXMLTree(AutomateHal):
 		''' Parse bib info like journal, page, keywords, etc.
 		'''
 
-		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		ns = self.xml_tree_name_space
-		
-		biblStructPath = self.biblStructPath
+		# The data of the paper and the elements of the tree are bound to locals once: No attribute lookup or tree walk below.
+		doc_data_for_tei = self.doc_data_for_tei
 
 		## ADD SourceDesc / bibliStruct / monogr : isbn
-		eMonogr = root.find(biblStructPath+'/tei:monogr', ns)
-		idx_item = 0
+		# The new children of monogr are built first, then inserted at its beginning at once, in this order.
+		eMonogr = self.xml_sections['monogr']
+		monogr_items = []
 
 		## ne pas coller l'ISBN si c'est un doctype COMM sinon cela créée une erreur (2021-01)
-		if self.doc_data_for_tei['isbn']  and not self.doc_data_for_tei['doctype'] == 'COMM':  
+		if doc_data_for_tei['isbn']  and not doc_data_for_tei['doctype'] == 'COMM':  
 			eIsbn = ET.Element('idno', {'type':'isbn'})
-			eIsbn.text = self.doc_data_for_tei["isbn"]
-			eMonogr.insert(idx_item, eIsbn)
-			idx_item += 1
+			eIsbn.text = doc_data_for_tei["isbn"]
+			monogr_items.append(eIsbn)
 
 		## ADD SourceDesc / bibliStruct / monogr : issn
 		# if journal is in Hal
-		if self.doc_data_for_tei['journalId'] :
+		if doc_data_for_tei['journalId'] :
 			eHalJid = ET.Element('idno', {'type':'halJournalId'})
-			eHalJid.text = self.doc_data_for_tei['journalId']
+			eHalJid.text = doc_data_for_tei['journalId']
 			eHalJid.tail = '\n'+'\t'*8
-			eMonogr.insert(idx_item, eHalJid)
-			idx_item += 1
+			monogr_items.append(eHalJid)
 
 		# if journal not in hal : paste issn
-		if not self.doc_data_for_tei['doctype'] == 'COMM':
-			if not self.doc_data_for_tei['journalId'] and self.doc_data_for_tei["issn"] :
+		if not doc_data_for_tei['doctype'] == 'COMM':
+			if not doc_data_for_tei['journalId'] and doc_data_for_tei["issn"] :
 				eIdIssn = ET.Element('idno', {'type':'issn'})
-				eIdIssn.text = self.doc_data_for_tei['issn']
+				eIdIssn.text = doc_data_for_tei['issn']
 				eIdIssn.tail = '\n'+'\t'*8
-				eMonogr.insert(idx_item, eIdIssn)
-				idx_item += 1
+				monogr_items.append(eIdIssn)
 
 		# if journal not in hal and doctype is ART then paste journal title
-		if not self.doc_data_for_tei['journalId'] and self.doc_data_for_tei['doctype'] == "ART" : 
+		if not doc_data_for_tei['journalId'] and doc_data_for_tei['doctype'] == "ART" : 
 			eTitleJ = ET.Element('title', {'level':'j'})
-			eTitleJ.text =  self.doc_data_for_tei['pub_name']
+			eTitleJ.text =  doc_data_for_tei['pub_name']
 			eTitleJ.tail = '\n'+'\t'*8
-			eMonogr.insert(idx_item, eTitleJ)
-			idx_item += 1
+			monogr_items.append(eTitleJ)
 
 		# if it is COUV or OUV paste book title
-		if self.doc_data_for_tei['doctype'] == "COUV" or self.doc_data_for_tei['doctype'] == "OUV" :
+		if doc_data_for_tei['doctype'] == "COUV" or doc_data_for_tei['doctype'] == "OUV" :
 			eTitleOuv = ET.Element('title', {'level':'m'})
-			eTitleOuv.text = self.doc_data_for_tei['pub_name']
+			eTitleOuv.text = doc_data_for_tei['pub_name']
 			eTitleOuv.tail = '\n'+'\t'*8
-			eMonogr.insert(idx_item, eTitleOuv)
-			idx_item += 1
+			monogr_items.append(eTitleOuv)
 
 		## ADD SourceDesc / bibliStruct / monogr / meeting : meeting
-		if self.doc_data_for_tei['doctype'] == 'COMM' : 
+		if doc_data_for_tei['doctype'] == 'COMM' : 
 			#conf title
 			eMeeting = ET.Element('meeting')
-			eMonogr.insert(idx_item, eMeeting)
+			monogr_items.append(eMeeting)
 			eTitle = ET.SubElement(eMeeting, 'title')
 			eTitle.text = self.doc_data['confname']
 					
@@ -2614,91 +3464,96 @@ class GenerateXMLTree(AutomateHal):
 			eDate.text = self.doc_data['confdate']
 					
 			#settlement
-			eSettlement = ET.SubElement(eMeeting, 'settlement')
-			if self.doc_data['conflocation'] is not None:
-				conf_city = self.doc_data['conflocation']['city']
-				eSettlement.text = conf_city if conf_city else 'unknown'
+			conflocation = self.doc_data['conflocation']
+			if conflocation is not None:
+				ET.SubElement(eMeeting, 'settlement').text = conflocation['city'] or 'unknown'
 			else:
-				eSettlement.text = 'Unknown city'
+				ET.SubElement(eMeeting, 'settlement').text = 'Unknown city'
 
 			# country
 			# Initial values
 			country_abrev = 'fr'
 			country_name = 'Unknown country'
 
-			if self.doc_data['conflocation'] is not None:
-				conf_country = self.doc_data['conflocation']['@country']
-
+			if conflocation is not None:
 				try:
-					country = pycountry.countries.search_fuzzy(conf_country)[0]
+					country = pycountry.countries.search_fuzzy(conflocation['@country'])[0]
 					country_abrev = country.alpha_2.lower()
 					country_name = country.name
 				except LookupError:
 					pass
 				
-			eSettlement = ET.SubElement(eMeeting, 'country', {'key': country_abrev})
-			eSettlement.text = country_name
+			ET.SubElement(eMeeting, 'country', {'key': country_abrev}).text = country_name
+
+		eMonogr[0:0] = monogr_items
 
 		#___ CHANGE  sourceDesc / monogr / imprint :  vol, issue, page, pubyear, publisher
-		eImprint = root.find(biblStructPath+'/tei:monogr/tei:imprint', ns)
-		for e in list(eImprint):
-			if e.get('unit') == 'issue': 
-				if self.doc_data_for_tei['issue']: 
-					if isinstance(self.doc_data_for_tei['issue'], str):
-						e.text = self.doc_data_for_tei['issue'] 
-					else:
-						if not math.isnan(self.doc_data_for_tei['issue']):
-							e.text = str(int(self.doc_data_for_tei['issue']))
-			if e.get('unit') == 'volume' : 
-				if self.doc_data_for_tei['volume']: 
-					if isinstance(self.doc_data_for_tei['volume'], str):
-						e.text = self.doc_data_for_tei['volume'] 
-					else:
-						if not math.isnan(self.doc_data_for_tei['volume']):
-							str(int(self.doc_data_for_tei['volume']))
-			if e.get('unit') == 'pp' : 
-				page_range = self.doc_data_for_tei['page_range']
-				if page_range and isinstance(page_range, str): e.text = page_range
-			cover_date = self.doc_data_for_tei['cover_date'] 
-			if e.tag.endswith('date') and isinstance(cover_date, str): e.text = cover_date
-			if e.tag.endswith('publisher') : e.text = self.doc_data_for_tei['publisher']
+		eImprint = self.xml_sections['imprint']
+		# Index the children once by (tag without name space, unit).
+		# The keys are a few short strings, looked up with literals (already interned by Python): No need to intern them.
+		imprint = {(e.tag.rsplit('}', 1)[-1], e.get('unit')): e for e in eImprint}
+
+		def format_number(value):
+			''' Text of an issue or volume number: Strings are kept, numbers are written as integers, NaN gives None.
+			'''
+			if isinstance(value, str): return value
+			if isinstance(value, int): return format(value, 'd')
+			if math.isnan(value): return None
+			return format(int(value), 'd')
+
+		for unit in ('issue', 'volume'):
+			e = imprint.get(('biblScope', unit))
+			value = doc_data_for_tei[unit]
+			if e is not None and value: 
+				text = format_number(value)
+				if text is not None: e.text = text
+		e = imprint.get(('biblScope', 'pp'))
+		page_range = doc_data_for_tei['page_range']
+		if e is not None and page_range and isinstance(page_range, str): e.text = page_range
+		e = imprint.get(('date', None))
+		cover_date = doc_data_for_tei['cover_date'] 
+		if e is not None and isinstance(cover_date, str): e.text = cover_date
+		e = imprint.get(('publisher', None))
+		if e is not None: e.text = doc_data_for_tei['publisher']
 
 		#_____ADD  sourceDesc / biblStruct : DOI & Pubmed
-		eBiblStruct = root.find(biblStructPath, ns)
+		eBiblStruct = self.xml_sections['biblStruct']
 		doi = self.doc_data['doi']
 		if doi and not self.debug_hal_upload: 
 			eDoi = ET.SubElement(eBiblStruct, 'idno', {'type':'doi'} )
 			eDoi.text = doi
 
 		#___CHANGE  profileDesc / langUsage / language
-		eLanguage = root.find(biblFullPath+'/tei:profileDesc/tei:langUsage/tei:language', ns)
-		eLanguage.attrib['ident'] = self.doc_data_for_tei["language"]
+		eLanguage = self.xml_sections['language']
+		eLanguage.attrib['ident'] = doc_data_for_tei["language"]
 
 		#___CHANGE  profileDesc / textClass / keywords/ term
-		eKeywords = root.find(biblFullPath+'/tei:profileDesc/tei:textClass/tei:keywords', ns)
+		eTextClass = self.xml_sections['textClass']
+		eKeywords = self.xml_sections['keywords']
 		eKeywords.clear()		
-		keywords_list = self.doc_data_for_tei['kw_list']
+		keywords_list = doc_data_for_tei['kw_list']
 		eKeywords.set('scheme', 'author')
 		if len(keywords_list)==0:
-			eTerm_i = ET.SubElement(eKeywords, 'term')
-			eTerm_i.set('xml:lang', self.doc_data_for_tei['language'])
-			eTerm_i.text = 'No keywords'
-		else:
-			for i in range(0, len(keywords_list)):
-				eTerm_i = ET.SubElement(eKeywords, 'term')
-				eTerm_i.set('xml:lang', self.doc_data_for_tei['language'])
-				eTerm_i.text = keywords_list[i]
+			keywords_list = ['No keywords']
+		# Build all the terms, then add them to keywords at once.
+		term_attrib = {'xml:lang': doc_data_for_tei['language']}
+		eTerms = []
+		for keyword in keywords_list:
+			eTerm_i = ET.Element('term', term_attrib)
+			eTerm_i.text = keyword
+			eTerms.append(eTerm_i)
+		eKeywords.extend(eTerms)
 
 		#___CHANGE  profileDesc / textClass / classCode : hal domaine & hal doctype
-		eTextClass = root.find(biblFullPath+'/tei:profileDesc/tei:textClass', ns)
-		for e in list(eTextClass):
-			if e.tag.endswith('classCode') : 
-				if e.attrib['scheme'] == 'halDomain': e.attrib['n'] = self.doc_data_for_tei['domain']
-				if e.attrib['scheme'] == 'halTypology': e.attrib['n'] = self.doc_data_for_tei['doctype']
+		eClassCodes = {e.get('scheme'): e for e in eTextClass.iterfind('tei:classCode', TEI_NS)}
+		eClassCodes['halDomain'].attrib['n'] = doc_data_for_tei['domain']
+		eClassCodes['halTypology'].attrib['n'] = doc_data_for_tei['doctype']
 
 		#___CHANGE  profileDesc / abstract 
-		eAbstract = root.find(biblFullPath+'/tei:profileDesc/tei:abstract', ns)
-		eAbstract.text = self.doc_data_for_tei['abstract']
+		# The abstract is False if there is none: The element of the sample is then left empty.
+		abstract = doc_data_for_tei['abstract']
+		if abstract:
+			self.xml_sections['abstract'].text = abstract
 
 
 	# Define private sub-function to parse differet part of the xml tree.
@@ -2707,14 +3562,9 @@ class GenerateXMLTree(AutomateHal):
 		Parse funder element. 
 		'''
 
-		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		ns = self.xml_tree_name_space
-
 		#___CHANGE titlesStmt : suppr and add funder	
 		#clear titlesStmt elements ( boz redundant info)
-		eTitleStmt = root.find(biblFullPath+'/tei:titleStmt', ns)
+		eTitleStmt = self.xml_sections['titleStmt']
 		eTitleStmt.clear()
 
 		# if applicable add funders	
@@ -2729,39 +3579,25 @@ class GenerateXMLTree(AutomateHal):
 		'''
 
 		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		ns = self.xml_tree_name_space
 		stamps = self.stamps
 
 		#___CHANGE editionStmt : suppr
-		eBiblFull = root.find(biblFullPath, ns)
-		eEdition = root.find(biblFullPath+'/tei:editionStmt', ns)
+		eBiblFull = self.xml_sections['biblFull']
+		eEdition = self.xml_sections['editionStmt']
 		eBiblFull.remove(eEdition)
 		#___CHANGE seriesStmt
-		eSeriesStmt = root.find(biblFullPath+'/tei:seriesStmt', ns)
+		eSeriesStmt = self.xml_sections['seriesStmt']
 		eSeriesStmt.clear()
-		eSeriesIdno_dict = {}
-		for i in range(0, len(stamps)):
-			eSeriesIdno_i = ET.SubElement(eSeriesStmt, 'idno')
-			eSeriesIdno_i.set('type','stamp')
-			eSeriesIdno_i.set('n', stamps[i])
-			eSeriesIdno_dict[stamps[i]] = eSeriesIdno_i
+		eSeriesStmt.extend(ET.Element('idno', {'type': 'stamp', 'n': stamp}) for stamp in stamps)
 
 	
 	def parse_title(self):
 		''' Parse title element.
 		'''
 
-		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		ns = self.xml_tree_name_space
-
 		#___CHANGE  sourceDesc / title
-		eAnalytic = root.find(biblFullPath+'/tei:sourceDesc/tei:biblStruct/tei:analytic', ns)
-		eTitle = root.find(biblFullPath+'/tei:sourceDesc/tei:biblStruct/tei:analytic/tei:title', ns)
-		eAnalytic.remove(eTitle) 
+		eAnalytic = self.xml_sections['analytic']
+		eAnalytic.remove(self.xml_sections['analyticTitle']) 
 				
 		eTitle = ET.Element('title', {'xml:lang': self.doc_data_for_tei["language"] })
 
@@ -2778,19 +3614,13 @@ class GenerateXMLTree(AutomateHal):
 		Add author information for one author.
 		'''
 		
-		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		ns = self.xml_tree_name_space
-
 		# Get the current author that needs processing.
 		aut = self.current_auth
-		eAnalytic = root.find(biblFullPath+'/tei:sourceDesc/tei:biblStruct/tei:analytic', ns)
+		eAnalytic = self.xml_sections['analytic']
 
 		# Set author role: Author or Corresponding author.
-		role  = 'aut' if not aut['corresp'] else 'crp' #correspond ou non
 		# Find the section and add the information.		
-		eAuth = ET.SubElement(eAnalytic, 'author', {'role':role}) 
+		eAuth = ET.SubElement(eAnalytic, 'author', AUTHOR_ROLE_ATTRIB[bool(aut['corresp'])]) 
 		
 		# Add personal information: Name, Surname, Email, Orcid, and others.
 		ePers = ET.SubElement(eAuth, 'persName')
@@ -2837,27 +3667,19 @@ class GenerateXMLTree(AutomateHal):
 		Add the author information for a list of authors.
 		'''
 
-		# Load parameters.
-		root = self.xmi_tree_root
-		biblFullPath = self.biblFullPath
-		biblStructPath = self.biblStructPath
-		ns = self.xml_tree_name_space		
-
-		eAnalytic = root.find(biblFullPath+'/tei:sourceDesc/tei:biblStruct/tei:analytic', ns)
+		eAnalytic = self.xml_sections['analytic']
 		#___CHANGE  sourceDesc / biblStruct / analytics / authors			
-		author = root.find(biblStructPath+'/tei:analytic/tei:author', ns)
-		eAnalytic.remove(author)
+		eAnalytic.remove(self.xml_sections['author'])
 
 		# Locate the back section of the xml file.
-		eListOrg = root.find('tei:text/tei:back/tei:listOrg', ns)
-		eOrg = root.find('tei:text/tei:back/tei:listOrg/tei:org', ns)
-		eListOrg.remove(eOrg)	
+		eListOrg = self.xml_sections['listOrg']
+		eListOrg.remove(self.xml_sections['org'])	
 	
 		# Start processing author by author:			
 
-		# Reset new affiliation index and list.
+		# Reset the new affiliations and their index.
 		self.new_affiliation_idx = 0
-		self.new_affliation = []
+		self.new_affiliation = {}
 
 		# For each author, write author information to the xml tree.
 		for aut in self.auths: 
@@ -2872,9 +3694,7 @@ class GenerateXMLTree(AutomateHal):
 
 		# In the end, if no new affiliations are added, remove the 'eBack' element.
 		if not self.allow_create_new_affiliation or self.new_affiliation_idx == 0:
-			eBack_Parent = root.find('tei:text', ns)
-			eBack = root.find('tei:text/tei:back', ns)
-			eBack_Parent.remove(eBack)
+			self.xml_sections['text'].remove(self.xml_sections['back'])
 
 
 # Testing here:
@@ -1,5 +1,9 @@
-from supports import automate_hal, search_for_lab, check_hal_availability
+from AutomateHal import AutomateHal
+from dataclasses import dataclass
+import csv, json, os, gc, time
+import numpy as np
 import pandas as pd
+from tqdm import tqdm
 
 
 # This script will check a research group, LGI-SR, searching for its publication in 2018-2024, and check the papers availability in HAL
@@ -7,7 +11,19 @@ import pandas as pd
 # We also check the list from HAL with the Stamp "LGI-SR".
 # The script will produce a csv file with the results.
 
-if __name__ == '__main__':
+
+@dataclass(slots=True)
+class Paper:
+    ''' A paper from the Scopus search results, with only the fields needed for checking it in HAL.
+    '''
+    eid: str
+    doi: str
+    title: str
+
+
+def run():
+    ''' Check the availability in HAL of the publications of the lab, and save the results to a csv file.
+    '''
     # Generate search query to search for publications from a given lab and a given time range.    
     # Define the range of years.
     search_query_range = 'PUBYEAR > 2017 AND PUBYEAR < 2025'
@@ -25,7 +41,20 @@ if __name__ == '__main__':
     # Search for this lab.
     # df_result = search_for_lab(search_query_range, affil_names, lab_db_path, save_to_path)
 
-    df_result = pd.read_csv(save_to_path)
+    # Skip the index columns ('Unnamed: 0', ...) written to the file by previous runs.
+    df_result = pd.read_csv(save_to_path, usecols=lambda column: not column.startswith('Unnamed: '))
+    # Columns of the output: The input columns, then the results of the check.
+    columns = [column for column in df_result.columns if column not in ('status', 'stamped team')]
+    # Papers without a title get an empty title, which matches no title in HAL.
+    df_result['title'] = df_result['title'].fillna('').astype('string')
+
+    # The results are written to part_path while the papers are processed, and moved to save_to_path at the end.
+    # If part_path exists, a previous run was interrupted: Skip the papers already in it.
+    part_path = save_to_path + '.part'
+    resume = os.path.exists(part_path)
+    if resume:
+        done_eids = set(pd.read_csv(part_path, usecols=['eid'])['eid'])
+        df_result = df_result[~df_result['eid'].isin(done_eids)]
 
     # Define paths for the input data.
     perso_data_path = './data/inputs/path_and_perso_data.json'
@@ -36,41 +65,107 @@ if __name__ == '__main__':
     stamp = 'LGI-SR'
     # stamps = ['LGI'] # Add your stamps here
     # Start processing.
-    auto_hal = automate_hal(perso_data_path, author_db_path, stamps='')
+    auto_hal = AutomateHal(perso_data_path=perso_data_path, author_db_path=author_db_path, stamps=[])
 
     # Get the results from the stamped team.
-    results_from_hal_team = auto_hal.reqHalStamp(stamp=stamp, start_year=2018, end_year=2025)
-    for i in range(results_from_hal_team[0]):
-        if i == 0:
-            df_team = pd.DataFrame(results_from_hal_team[1][i])
+    # They are cached in team_cache_path for a day, so that warm runs do not query HAL again.
+    start_year, end_year = 2018, 2025
+    team_cache_path = './data/outputs/team_{}_{}_{}.csv'.format(stamp, start_year, end_year)
+    if os.path.exists(team_cache_path) and time.time() - os.path.getmtime(team_cache_path) < 24*3600:
+        df_team = pd.read_csv(team_cache_path, usecols=['title_s'], dtype={'title_s': 'category'})
+    else:
+        results_from_hal_team = auto_hal.reqHalStamp(stamp=stamp, start_year=start_year, end_year=end_year)
+        if results_from_hal_team[1]:
+            df_team = pd.concat([pd.DataFrame(p) for p in results_from_hal_team[1]], ignore_index=True)
         else:
-            df_team = pd.concat([df_team, pd.DataFrame(results_from_hal_team[1][i])])
+            df_team = pd.DataFrame(columns=['title_s'])
+        df_team.to_csv(team_cache_path, index=False)
     
-    # For each paper, check if it existed in HAL and in HAL stamped group.
-    for i, doc in df_result.iterrows():
-        # Update the iteration index.
-        auto_hal.ite = i
-        auto_hal.docid = {'eid': doc['eid'], 'doi': doc['doi'], 'doctype': ''}
-        print('{}/{} iterations: {}'.format(i+1, len(df_result), doc['eid']))
-        # Process the corresponding paper.
-        try:
-            if auto_hal.verify_if_existed_in_hal(doc):                
-                df_result.loc[i, 'status'] = 'Already existed in HAL!'
-                # Check if included in the stamped team already.
-                paper_title = df_result.loc[i, 'title']
-                if df_team['title_s'].str.contains(paper_title, case=False).any():
-                    df_result.loc[i, 'stamped team'] = 'Already existed in the stamped team!'
-                else:
-                    df_result.loc[i, 'stamped team'] = 'Not existed in the stamped team!'
-            else:
-                df_result.loc[i, 'status'] = 'Not existed in HAL!'
-                df_result.loc[i, 'stamped team'] = 'Not existed in the stamped team!'
-        except Exception as error:
-            print('Error processing paper: {}. Log saved.'.format(doc['eid']))
-            print('Error is: {}'.format(error))
-            auto_hal.addRow(docId=auto_hal.docid, state='Error processing paper.', treat_info='Error is: {}'.format(error))
-
-    df_result.to_csv(save_to_path)
+    # Normalize the titles on both sides once, as the title searches in HAL do, so that the check against the stamped team is a set membership test.
+    # The team titles are stored as a categorical, so that each distinct title is normalized only once.
+    # Missing titles are not in the categories, and empty titles are discarded: They never match a paper.
+    df_team['title_s'] = df_team['title_s'].astype('category')
+    team_titles = set(df_team['title_s'].cat.categories.map(auto_hal.normalize_title))
+    team_titles.discard('')
+    # df_team is not needed anymore: Free it before the long loop over the papers.
+    del df_team
+    gc.collect()
+    in_team = df_result['title'].map(auto_hal.normalize_title).isin(team_titles).tolist()
+
+    # Check if the papers existed in HAL. 
+    # First, get all the DOIs in HAL for the structure of the lab, with a few paged requests.
+    # Only the names of the lab itself are searched: The broad names of affil_names (e.g. 'Paris-Saclay') match 
+    # far more documents than the lab has, and their DOIs would be downloaded for nothing.
+    # The papers not found this way are verified one by one below.
+    # Like the results of the stamped team, the DOIs are cached in hal_dois_cache_path for a day.
+    lab_structures = ['Laboratoire Genie Industriel', 'Laboratoire Génie Industriel']
+    hal_dois_cache_path = './data/outputs/hal_dois_{}_{}_{}.csv'.format(stamp, start_year, end_year)
+    if os.path.exists(hal_dois_cache_path) and time.time() - os.path.getmtime(hal_dois_cache_path) < 24*3600:
+        hal_dois = set(pd.read_csv(hal_dois_cache_path, usecols=['doi'], dtype={'doi': 'string'})['doi'].dropna())
+    else:
+        hal_dois = auto_hal.reqHalDois(affils=lab_structures, start_year=start_year, end_year=end_year)
+        pd.DataFrame({'doi': sorted(hal_dois)}).to_csv(hal_dois_cache_path, index=False)
+    dois = df_result['doi'].tolist()
+    titles = df_result['title'].tolist()
+    in_team = np.array(in_team, dtype=bool)
+    papers = [Paper(*row) for row in df_result[['eid', 'doi', 'title']].itertuples(index=False, name=None)]
+    rows = list(df_result[columns].fillna('').itertuples(index=False, name=None))
+
+    # Then, verify the remaining papers one by one, by chunks of chunk_size papers. At most max_workers HAL requests are in flight at a time.
+    # The results are cached in hal_cache_path: Set refresh_cache = True to query HAL again for all the papers.
+    hal_cache_path = './data/outputs/hal_verification_cache.json'
+    refresh_cache = False
+    chunk_size = 200
+    # The papers that could not be checked are logged in auto_hal.log_file, saved to log_path after each chunk with errors.
+    log_path = './data/outputs/log_lgi_sr.json'
+
+    # The results of each chunk are appended to part_path as soon as the chunk is verified, and flushed to the disk:
+    # If the run is interrupted, the next run resumes after the last chunk written.
+    # The rows are written through a 1 MiB buffer, so that they are written to the disk by large blocks.
+    # The progress bar counts the papers as their verification finishes.
+    with open(part_path, 'a', newline='', encoding='utf-8', buffering=1<<20) as fh, \
+            tqdm(total=len(papers), desc='Checking in HAL') as progress_bar:
+        writer = csv.writer(fh)
+        if not resume:
+            # The header is flushed at once: A part file is never left empty, which the resume could not read.
+            writer.writerow(columns + ['status', 'stamped team'])
+            fh.flush()
+
+        for start in range(0, len(papers), chunk_size):
+            stop = min(start + chunk_size, len(papers))
+            in_hal = [isinstance(doi, str) and doi.lower() in hal_dois for doi in dois[start:stop]]
+            to_verify = [k for k in range(stop - start) if not in_hal[k]]
+            progress_bar.update(len(in_hal) - len(to_verify))
+            # The cache is refreshed with the first chunk only: The next chunks add their results to it.
+            verified = auto_hal.verify_papers_in_hal([dois[start+k] for k in to_verify], [titles[start+k] for k in to_verify], max_workers=16,
+                                                     cache_path=hal_cache_path, refresh_cache=refresh_cache and start == 0,
+                                                     progress=progress_bar.update)
+            for k, result in zip(to_verify, verified):
+                in_hal[k] = result
+
+            # Report if the papers existed in HAL and in HAL stamped group, with vectorized expressions over the results.
+            is_error = np.array([isinstance(result, Exception) for result in in_hal], dtype=bool)
+            exists = np.array([result is True for result in in_hal], dtype=bool)
+            status_out = np.where(exists, 'Already existed in HAL!', 'Not existed in HAL!').astype(object)
+            team_out = np.where(exists & in_team[start:stop], 'Already existed in the stamped team!', 'Not existed in the stamped team!').astype(object)
+            status_out[is_error] = 'Error processing paper.'
+            team_out[is_error] = ''
+
+            # Log the papers that could not be checked.
+            for k in np.flatnonzero(is_error):
+                paper, error = papers[start + k], in_hal[k]
+                tqdm.write('Error processing paper: {}. Log saved.'.format(paper.eid))
+                tqdm.write('Error is: {}'.format(error))
+                auto_hal.add_an_entry_to_log_file(auto_hal.log_file, 
+                    'Error processing paper {} (doi: {}): {}'.format(paper.eid, paper.doi, error))
+            if is_error.any():
+                with open(log_path, 'w', encoding='utf-8') as log_fh:
+                    json.dump(auto_hal.log_file, log_fh, indent=4)
+
+            writer.writerows(row + (status, team) for row, status, team in zip(rows[start:stop], status_out, team_out))
+            fh.flush()
+
+    os.replace(part_path, save_to_path)
 
     
 
@@ -96,3 +191,7 @@ if __name__ == '__main__':
     #         print('Error processing paper: {}. Log saved.'.format(doc['eid']))
     #         print('Error is: {}'.format(error))
     #         auto_hal.addRow(docId=auto_hal.docid, state='Error processing paper.', treat_info='Error is: {}'.format(error))
+
+
+if __name__ == '__main__':
+    run()
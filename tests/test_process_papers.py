@@ -0,0 +1,37 @@
+import os, sys
+from types import SimpleNamespace
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+AutomateHal = pytest.importorskip('AutomateHal')
+
+
+def test_process_papers_with_prefetch(tmp_path, monkeypatch):
+	''' Smoke test of process_papers with the prefetches running (max_workers > 1), without network access:
+	Scopus and HAL are replaced by fakes, and the papers are recorded instead of processed.
+	'''
+	monkeypatch.chdir(tmp_path)
+
+	author = SimpleNamespace(auid='123', orcid='0000-0001-2345-6789')
+	record = SimpleNamespace(authorgroup=[author], authors=[author])
+	monkeypatch.setattr(AutomateHal, 'AbstractRetrieval', lambda eid, view='FULL': record)
+	monkeypatch.setattr(AutomateHal, 'AuthorRetrieval', lambda auid: SimpleNamespace(orcid=None))
+	monkeypatch.setattr(AutomateHal.AutomateHal, 'reqHal', lambda self, *args, **kwargs: [0, []])
+	processed = []
+	monkeypatch.setattr(AutomateHal.AutomateHal, 'process_one_paper', lambda self, doc: processed.append(doc['eid']))
+
+	auto_hal = AutomateHal.AutomateHal(debug_hal_upload=False)
+	df_result = pd.DataFrame({
+		'eid': ['2-s2.0-1', '2-s2.0-2'],
+		'doi': ['10.1000/a', None],
+		'title': ['First paper', 'Second paper'],
+		'issn': ['12345678', None]
+	})
+	auto_hal.process_papers(df_result, row_range=[0, 1], max_workers=4, upload_workers=0)
+
+	assert processed == ['2-s2.0-1', '2-s2.0-2']
+	assert auto_hal.orcid_cache['123'] == '0000-0001-2345-6789'
+	assert set(auto_hal.abstract_cache) == {'2-s2.0-1', '2-s2.0-2'}
+	assert auto_hal.doi_hit_cache == {'10.1000/a': None}